@@ -1,46 +1,260 @@
+import io
 import json
-import pickle
+import re
+import threading
+import time
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.feature_selection import VarianceThreshold
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import FunctionTransformer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
 import requests
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from nltk.stem import PorterStemmer
 import joblib
+from joblib import Parallel, delayed
 import logging
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from flask import current_app
 from app import db
-from models import AIModel, KnowledgeBase, ChatbotTraining, PredictionResult
+from batch_writer import BatchWriter
+from json_utils import dumps
+from keyword_matcher import KeywordMatcher
+from models import AIModel, KnowledgeBase, Keyword, kb_keywords, ChatbotTraining, PredictionResult
 
-# Download required NLTK data
 try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+    from numba import njit, prange
+    from numba.typed import List as TypedList
+except ImportError:
+    njit = None
+    prange = range
+    TypedList = list
 
 try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    ort = None
+    convert_sklearn = None
+
+# Columns of the in-memory knowledge base frame
+_KB_COLUMNS = ['id', 'topic', 'content', 'confidence', 'source', 'keywords']
+
+# Seconds before the knowledge base frame is reloaded from the database
+_KB_SNAPSHOT_TTL = 300
+
+# A knowledge base frame with the indexes fitted to its rows; always replaced as a whole, so
+# readers never pair one frame with another frame's indexes
+_KnowledgeIndex = namedtuple('_KnowledgeIndex', 'frame vectorizer matrix postings token_lens')
+
+# Queued chatbot interactions are written in batches of up to this many,
+# or whatever has arrived within the flush interval (seconds)
+_INTERACTION_BATCH_SIZE = 100
+_INTERACTION_FLUSH_INTERVAL = 2
+
+# Largest training matrix (rows x used features) densified for gradient boosting
+_MAX_DENSE_CELLS = 5_000_000
+
+# Stateless training-side vectorizer: no vocabulary to fit, store or keep in sync
+_HASHER = HashingVectorizer(n_features=1 << 18, alternate_sign=False, stop_words='english')
+
+# Routing tables, compiled once: categories are listed in priority order
+# Keyword tables are constants, so each is compiled into a matcher once at import
+_PREDICT_KEYWORDS = frozenset({'predict', 'prediction', 'calculate'})
+_SAFETY_KEYWORDS = frozenset({'toxicity', 'toxic', 'safety'})
+_OPTIMIZE_KEYWORDS = frozenset({'optimize', 'improve', 'enhance'})
+_DRUG_KEYWORDS = frozenset({'drug', 'compound', 'molecule', 'discovery'})
+_PHARMA_KEYWORDS = frozenset({'pharmacology', 'mechanism', 'receptor'})
+_TOX_KEYWORDS = frozenset({'toxic', 'safety', 'adverse'})
+
+_INTENT_MATCHER = KeywordMatcher({
+    'predict': _PREDICT_KEYWORDS,
+    'safety': _SAFETY_KEYWORDS,
+    'optimize': _OPTIMIZE_KEYWORDS
+})
+_FALLBACK_MATCHER = KeywordMatcher({
+    'drug_discovery': _DRUG_KEYWORDS,
+    'pharmacology': _PHARMA_KEYWORDS,
+    'toxicology': _TOX_KEYWORDS
+})
+_TOPIC_MATCHER = KeywordMatcher({
+    'drug_discovery': _DRUG_KEYWORDS | {'synthesis'},
+    'pharmacology': _PHARMA_KEYWORDS | {'binding'},
+    'toxicology': _TOX_KEYWORDS | {'toxicity', 'side effect'}
+})
+
+# (prefix, suffix) wrapped around a knowledge entry for each query intent
+_INTENT_TEMPLATES = {
+    'predict': ("Based on current research data: ", "\n\nWould you like me to run specific predictions on your compound?"),
+    'safety': ("Regarding safety considerations: ", "\n\nI recommend conducting thorough toxicity screening before proceeding."),
+    'optimize': ("For optimization strategies: ", "\n\nI can analyze your compound structure and suggest specific modifications.")
+}
+
+_FALLBACK_RESPONSES = {
+    'drug_discovery': "I understand you're asking about drug discovery. While I don't have specific information about your query, I can help you with molecular analysis, compound optimization, or toxicity prediction. Could you provide more details?",
+    'pharmacology': "Your question relates to pharmacology. I can assist with drug mechanisms, interactions, or ADMET properties. Please provide more specific details about what you'd like to know.",
+    'toxicology': "This appears to be a toxicology question. I can help predict potential toxicity issues or suggest safety testing approaches. What specific compound or concern are you investigating?",
+    'general': "I'm here to help with drug discovery and molecular analysis. Could you please rephrase your question or provide more context about what you're trying to achieve?"
+}
+
+# Structural alerts counted by the rule-based toxicity flag
+_TOX_FLAG_RE = re.compile(r'\[N\+\]|Cl|Br|S\(=O\)\(=O\)')
+
+# SMILES byte values used by the compiled scoring kernel
+_CH_C, _CH_N, _CH_O, _CH_S, _CH_AROMATIC_C = ord('C'), ord('N'), ord('O'), ord('S'), ord('c')
+_CH_L, _CH_B, _CH_R, _CH_BRACKET, _CH_PLUS, _CH_CLOSE = ord('l'), ord('B'), ord('r'), ord('['), ord('+'), ord(']')
+_SULFONYL = np.frombuffer(b'S(=O)(=O)', dtype=np.uint8)
+
+_STEMMER = PorterStemmer()
+_TOKEN_RE = re.compile(r"[a-z]+")
+_nltk_ready = False
+
+def _ensure_nltk():
+    """Download required NLTK data once per process"""
+    global _nltk_ready
+    if _nltk_ready:
+        return
+    
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    
+    _nltk_ready = True
+
+@lru_cache(maxsize=None)
+def _stop_words():
+    """English stopwords, loaded from the NLTK corpus on first use"""
+    _ensure_nltk()
+    return frozenset(stopwords.words('english'))
+
+@lru_cache(maxsize=None)
+def _spacy_pipeline():
+    """spaCy pipeline for batch lemmatisation, or None when spaCy is not installed"""
+    try:
+        import spacy
+        return spacy.load('en_core_web_sm', disable=['ner', 'parser'])
+    except (ImportError, OSError):
+        return None
+
+def _jit(**options):
+    """Compile with numba.njit when numba is installed, otherwise run as plain Python"""
+    if njit is None:
+        return lambda func: func
+    return njit(**options)
+
+@_jit(cache=True)
+def _score_smiles(buf):
+    """Walk SMILES bytes once: counts of C, N, O, S, aromatic c, then a toxicity alert bitmask"""
+    result = np.zeros(6, dtype=np.int64)
+    n = buf.size
+    
+    for i in range(n):
+        ch = buf[i]
+        if ch == _CH_C:
+            result[0] += 1
+            if i + 1 < n and buf[i + 1] == _CH_L:
+                result[5] |= 2
+        elif ch == _CH_N:
+            result[1] += 1
+        elif ch == _CH_O:
+            result[2] += 1
+        elif ch == _CH_S:
+            result[3] += 1
+            if i + _SULFONYL.size <= n:
+                sulfonyl = True
+                for j in range(_SULFONYL.size):
+                    if buf[i + j] != _SULFONYL[j]:
+                        sulfonyl = False
+                        break
+                if sulfonyl:
+                    result[5] |= 8
+        elif ch == _CH_AROMATIC_C:
+            result[4] += 1
+        elif ch == _CH_B:
+            if i + 1 < n and buf[i + 1] == _CH_R:
+                result[5] |= 4
+        elif ch == _CH_BRACKET:
+            if i + 3 < n and buf[i + 1] == _CH_N and buf[i + 2] == _CH_PLUS and buf[i + 3] == _CH_CLOSE:
+                result[5] |= 1
+    
+    return result
+
+@_jit(cache=True, parallel=True)
+def _score_smiles_batch(buffers):
+    """Score many encoded SMILES strings, one row of _score_smiles output per input"""
+    scores = np.zeros((len(buffers), 6), dtype=np.int64)
+    for i in prange(len(buffers)):
+        scores[i, :] = _score_smiles(buffers[i])
+    return scores
+
+def _densify(X):
+    """Convert a sparse feature matrix to a dense array"""
+    return X.toarray()
+
+def _fit_and_score(model_name, model, X_train, y_train, X_test, y_test):
+    """Fit one candidate model and return it with its held-out accuracy"""
+    try:
+        model.fit(X_train, y_train)
+        return model_name, model, accuracy_score(y_test, model.predict(X_test))
+    except Exception as e:
+        logging.error(f"Error fitting {model_name} model: {e}")
+        return model_name, None, 0
+
+def _export_onnx(model, n_features):
+    """Serialise a fitted classifier to ONNX, or return None when unavailable"""
+    if convert_sklearn is None:
+        return None
+    
+    # ONNX inputs are already dense, so the densifying step is dropped from pipelines
+    if isinstance(model, Pipeline):
+        model = Pipeline([step for step in model.steps if not isinstance(step[1], FunctionTransformer)])
+    
+    try:
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[('input', FloatTensorType([None, n_features]))],
+            options={id(model): {'zipmap': False}}
+        )
+        return onnx_model.SerializeToString()
+    except Exception as e:
+        logging.error(f"Error exporting model to ONNX: {e}")
+        return None
 
 class AIEngine:
     """Advanced AI Engine for drug discovery with self-training capabilities"""
     
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
-        self.stemmer = PorterStemmer()
-        self.stop_words = set(stopwords.words('english'))
+        self.stemmer = _STEMMER
+        self.stop_words = _stop_words()
         self.models = {}
-        self.knowledge_base = {}
+        self._models_lock = threading.RLock()
+        self._kb_index = _KnowledgeIndex(
+            pd.DataFrame(columns=_KB_COLUMNS), None, None, {}, np.zeros(0, dtype=np.int32)
+        )
+        self._kb_loaded_at = float('-inf')
+        self._kb_reload_lock = threading.Lock()
         self.load_existing_models()
         self.initialize_knowledge_base()
+        if self._kb_index.matrix is None:
+            self._kb_index = self.build_knowledge_index(self._kb_index.frame)
+        
+        # Write queued interactions in the background
+        self._interaction_writer = BatchWriter(
+            current_app._get_current_object(), self._write_interactions,
+            batch_size=_INTERACTION_BATCH_SIZE, flush_interval=_INTERACTION_FLUSH_INTERVAL,
+            name='interaction-writer'
+        )
     
     def load_existing_models(self):
         """Load existing trained models from database"""
@@ -49,13 +263,14 @@ class AIEngine:
             for model_record in ai_models:
                 if model_record.model_data:
                     try:
-                        model_data = pickle.loads(model_record.model_data.encode('latin-1'))
-                        self.models[model_record.model_type] = {
-                            'model': model_data,
-                            'accuracy': model_record.accuracy_score,
-                            'version': model_record.version,
-                            'last_trained': model_record.last_trained
-                        }
+                        model_data = joblib.load(io.BytesIO(model_record.model_data))
+                        with self._models_lock:
+                            self.models[model_record.model_type] = {
+                                **model_data,
+                                'accuracy': model_record.accuracy_score,
+                                'version': model_record.version,
+                                'last_trained': model_record.last_trained
+                            }
                         logging.info(f"Loaded AI model: {model_record.name}")
                     except Exception as e:
                         logging.error(f"Error loading model {model_record.name}: {e}")
@@ -66,16 +281,7 @@ class AIEngine:
         """Initialize and update knowledge base from online sources"""
         try:
             # Load existing knowledge base
-            kb_entries = KnowledgeBase.query.all()
-            for entry in kb_entries:
-                if entry.topic not in self.knowledge_base:
-                    self.knowledge_base[entry.topic] = []
-                self.knowledge_base[entry.topic].append({
-                    'content': entry.content,
-                    'confidence': entry.confidence_score,
-                    'source': entry.source_url,
-                    'keywords': json.loads(entry.keywords) if entry.keywords else []
-                })
+            self._kb_snapshot()
             
             # Update knowledge base with fresh data
             self.update_knowledge_base()
@@ -83,6 +289,60 @@ class AIEngine:
         except Exception as e:
             logging.error(f"Error initializing knowledge base: {e}")
     
+    def load_knowledge_frame(self):
+        """Load the knowledge base into a columnar DataFrame"""
+        linked_keywords = defaultdict(set)
+        for entry_id, term in db.session.query(kb_keywords.c.knowledge_base_id, Keyword.term).join(
+            Keyword, Keyword.id == kb_keywords.c.keyword_id
+        ):
+            linked_keywords[entry_id].add(term)
+        
+        # Entries added outside the keyword tables still carry only the JSON column
+        rows = [
+            (entry_id, topic, content, confidence or 0.0, source,
+             frozenset(linked_keywords[entry_id]) if entry_id in linked_keywords
+             else frozenset(json.loads(keywords)) if keywords else frozenset())
+            for entry_id, topic, content, confidence, source, keywords in db.session.query(
+                KnowledgeBase.id, KnowledgeBase.topic, KnowledgeBase.content,
+                KnowledgeBase.confidence_score, KnowledgeBase.source_url, KnowledgeBase.keywords
+            )
+        ]
+        return pd.DataFrame(rows, columns=_KB_COLUMNS).astype({'confidence': 'float32'})
+    
+    def _kb_snapshot(self):
+        """Return the knowledge base index, reloading it once the TTL has expired"""
+        kb_index = self._kb_index
+        if time.monotonic() - self._kb_loaded_at < _KB_SNAPSHOT_TTL:
+            return kb_index
+        
+        # One thread reloads per expiry while the others keep serving the current index;
+        # everyone waits when there is no loaded index yet or it was invalidated
+        if not self._kb_reload_lock.acquire(blocking=self._kb_loaded_at == float('-inf')):
+            return kb_index
+        
+        try:
+            # Another thread may have reloaded while this one waited
+            if time.monotonic() - self._kb_loaded_at < _KB_SNAPSHOT_TTL:
+                return self._kb_index
+            
+            kb_df = self.load_knowledge_frame()
+            
+            # Only refit the indexes when entries were added or removed elsewhere
+            if kb_df['id'].equals(self._kb_index.frame['id']):
+                kb_index = self._kb_index._replace(frame=kb_df)
+            else:
+                kb_index = self.build_knowledge_index(kb_df)
+            
+            self._kb_index = kb_index
+            self._kb_loaded_at = time.monotonic()
+            return kb_index
+        finally:
+            self._kb_reload_lock.release()
+    
+    def invalidate_kb_snapshot(self):
+        """Force the next snapshot access to reload the knowledge base"""
+        self._kb_loaded_at = float('-inf')
+    
     def update_knowledge_base(self):
         """Update knowledge base with fresh data from reliable sources"""
         sources = {
@@ -151,31 +411,92 @@ class AIEngine:
             ]
         }
         
-        # Store in database
-        for topic, entries in knowledge_data.items():
-            for entry in entries:
-                existing = KnowledgeBase.query.filter_by(
-                    topic=topic, 
-                    content=entry['content']
-                ).first()
-                
-                if not existing:
-                    kb_entry = KnowledgeBase(
-                        topic=topic,
-                        content=entry['content'],
-                        keywords=json.dumps(entry['keywords']),
-                        confidence_score=entry['confidence'],
-                        category='drug_discovery',
-                        is_verified=True
-                    )
-                    db.session.add(kb_entry)
+        # Store in database, fetching existing entries once instead of per row
+        existing = {
+            (topic, content)
+            for topic, content in db.session.query(KnowledgeBase.topic, KnowledgeBase.content)
+        }
+        new_entries = [
+            {
+                'topic': topic,
+                'content': entry['content'],
+                'keywords': json.dumps(entry['keywords']),
+                'confidence_score': entry['confidence'],
+                'category': 'drug_discovery',
+                'is_verified': True
+            }
+            for topic, entries in knowledge_data.items()
+            for entry in entries
+            if (topic, entry['content']) not in existing
+        ]
+        
+        if not new_entries:
+            return
         
         try:
+            # return_defaults fills in each row's id so its keywords can be linked
+            db.session.bulk_insert_mappings(KnowledgeBase, new_entries, return_defaults=True)
+            self.link_keywords(
+                (row['id'], json.loads(row['keywords'])) for row in new_entries
+            )
             db.session.commit()
             logging.info("Knowledge base updated with comprehensive drug discovery data")
         except Exception as e:
             db.session.rollback()
             logging.error(f"Error updating knowledge base: {e}")
+            return
+        
+        # Reload the frame and refit the similarity index so they reflect the committed entries
+        self.invalidate_kb_snapshot()
+        self._kb_snapshot()
+    
+    def link_keywords(self, entry_keywords):
+        """Link (entry id, keyword list) pairs through the keyword tables, creating missing terms"""
+        entry_keywords = [(entry_id, set(keywords)) for entry_id, keywords in entry_keywords]
+        terms = set().union(*(keywords for _, keywords in entry_keywords))
+        if not terms:
+            return
+        
+        term_ids = dict(db.session.query(Keyword.term, Keyword.id).filter(Keyword.term.in_(terms)))
+        missing = [{'term': term} for term in terms if term not in term_ids]
+        if missing:
+            db.session.bulk_insert_mappings(Keyword, missing, return_defaults=True)
+            term_ids.update((row['term'], row['id']) for row in missing)
+        
+        db.session.execute(kb_keywords.insert(), [
+            {'knowledge_base_id': entry_id, 'keyword_id': term_ids[term]}
+            for entry_id, keywords in entry_keywords
+            for term in keywords
+        ])
+    
+    def build_knowledge_index(self, kb_df):
+        """Build the TF-IDF and token postings indexes used to score queries against kb_df's rows"""
+        try:
+            # Index the same normalised form that incoming queries are reduced to
+            corpus = self.preprocess_batch(kb_df['content'].tolist())
+            
+            # Inverted index for the Jaccard fallback: token -> entry positions
+            token_sets = [frozenset(text.split()) for text in corpus]
+            postings = defaultdict(list)
+            for position, tokens in enumerate(token_sets):
+                for token in tokens:
+                    postings[token].append(position)
+            postings = {token: np.asarray(positions, dtype=np.int32) for token, positions in postings.items()}
+            token_lens = np.fromiter((len(tokens) for tokens in token_sets), dtype=np.int32, count=len(token_sets))
+        except Exception as e:
+            logging.error(f"Error building knowledge index: {e}")
+            return _KnowledgeIndex(kb_df, None, None, {}, np.zeros(len(kb_df), dtype=np.int32))
+        
+        try:
+            # A fresh vectorizer per index, so queries never see a vocabulary that doesn't
+            # match the indexed rows
+            query_vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+            kb_matrix = query_vectorizer.fit_transform(corpus) if corpus else None
+        except Exception as e:
+            logging.error(f"Error fitting knowledge TF-IDF index: {e}")
+            query_vectorizer, kb_matrix = None, None
+        
+        return _KnowledgeIndex(kb_df, query_vectorizer, kb_matrix, postings, token_lens)
     
     def train_drug_discovery_model(self):
         """Train AI model for drug discovery predictions"""
@@ -187,12 +508,11 @@ class AIEngine:
                 logging.warning("Insufficient training data for drug discovery model")
                 return False
             
-            # Prepare features and labels
-            X = [item['text'] for item in training_data]
-            y = [item['label'] for item in training_data]
-            
-            # Vectorize text data
-            X_vectorized = self.vectorizer.fit_transform(X)
+            # Hash text straight from the (text, label) rows, so only the IDF weights
+            # need fitting; the knowledge base index is left untouched
+            tfidf = TfidfTransformer()
+            X_vectorized = tfidf.fit_transform(_HASHER.transform(text for text, _ in training_data))
+            y = np.array([label for _, label in training_data], dtype='U16')
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -202,28 +522,55 @@ class AIEngine:
             # Train multiple models and select the best
             models_to_try = {
                 'naive_bayes': MultinomialNB(),
-                'logistic_regression': LogisticRegression(max_iter=1000),
-                'random_forest': RandomForestClassifier(n_estimators=100)
+                'logistic_regression': LogisticRegression(solver='liblinear', C=1.0, max_iter=1000, random_state=42)
             }
             
+            # Gradient boosting needs dense input, so drop the unused hash buckets
+            # first and only offer it when densifying the rest is cheap
+            used_features = np.count_nonzero(X_train.getnnz(axis=0))
+            if X_train.shape[0] * used_features <= _MAX_DENSE_CELLS:
+                models_to_try['hist_gradient_boosting'] = make_pipeline(
+                    VarianceThreshold(),
+                    FunctionTransformer(_densify, accept_sparse=True),
+                    HistGradientBoostingClassifier(max_iter=200, random_state=42)
+                )
+            
+            # Candidates are independent and release the GIL while fitting, so run
+            # them on threads; process workers would re-import app and re-run startup
+            results = Parallel(n_jobs=len(models_to_try), backend='threading')(
+                delayed(_fit_and_score)(model_name, model, X_train, y_train, X_test, y_test)
+                for model_name, model in models_to_try.items()
+            )
+            
             best_model = None
             best_accuracy = 0
             
-            for model_name, model in models_to_try.items():
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-                accuracy = accuracy_score(y_test, y_pred)
-                
-                if accuracy > best_accuracy:
+            for model_name, model, accuracy in results:
+                if model is not None and accuracy > best_accuracy:
                     best_accuracy = accuracy
                     best_model = model
             
+            # Export an ONNX copy for inference; the sklearn model stays as the training artifact
+            onnx_data = _export_onnx(best_model, X_train.shape[1])
+            
             # Save the best model
-            model_data = pickle.dumps({
+            buffer = io.BytesIO()
+            joblib.dump({
                 'model': best_model,
-                'vectorizer': self.vectorizer,
-                'accuracy': best_accuracy
-            })
+                'tfidf': tfidf,
+                'accuracy': best_accuracy,
+                'onnx_data': onnx_data
+            }, buffer, compress=('zlib', 3))
+            model_data = buffer.getvalue()
+            
+            # Update local model cache first, so a failed save still leaves a usable model
+            with self._models_lock:
+                self.models['drug_discovery'] = {
+                    'model': best_model,
+                    'tfidf': tfidf,
+                    'accuracy': best_accuracy,
+                    'onnx_data': onnx_data
+                }
             
             # Store in database
             existing_model = AIModel.query.filter_by(
@@ -231,7 +578,7 @@ class AIEngine:
             ).first()
             
             if existing_model:
-                existing_model.model_data = model_data.decode('latin-1')
+                existing_model.model_data = model_data
                 existing_model.accuracy_score = best_accuracy
                 existing_model.last_trained = datetime.utcnow()
                 existing_model.version = str(float(existing_model.version) + 0.1)
@@ -240,7 +587,7 @@ class AIEngine:
                     name='Drug Discovery Predictor',
                     model_type='drug_discovery',
                     description='AI model for predicting drug discovery outcomes',
-                    model_data=model_data.decode('latin-1'),
+                    model_data=model_data,
                     accuracy_score=best_accuracy,
                     training_data_source='chatbot_interactions_knowledge_base'
                 )
@@ -248,13 +595,6 @@ class AIEngine:
             
             db.session.commit()
             
-            # Update local model cache
-            self.models['drug_discovery'] = {
-                'model': best_model,
-                'vectorizer': self.vectorizer,
-                'accuracy': best_accuracy
-            }
-            
             logging.info(f"Drug discovery model trained with accuracy: {best_accuracy:.3f}")
             return True
             
@@ -264,35 +604,32 @@ class AIEngine:
             return False
     
     def prepare_training_data(self, model_type):
-        """Prepare training data from various sources"""
+        """Prepare (text, label) training rows from various sources"""
         training_data = []
         
+        # Make sure buffered interactions are visible to the queries below
+        self.flush_interactions()
+        
         try:
-            # Get data from chatbot interactions
-            interactions = ChatbotTraining.query.filter_by(
-                topic_category=model_type,
-                is_training_data=True
-            ).all()
-            
-            for interaction in interactions:
-                if interaction.user_feedback == 'positive':
-                    training_data.append({
-                        'text': interaction.user_query,
-                        'label': 'relevant'
-                    })
-                elif interaction.user_feedback == 'negative':
-                    training_data.append({
-                        'text': interaction.user_query,
-                        'label': 'irrelevant'
-                    })
+            # Get data from chatbot interactions, streamed as plain tuples
+            interactions = db.session.query(
+                ChatbotTraining.user_query, ChatbotTraining.user_feedback
+            ).filter(
+                ChatbotTraining.topic_category == model_type,
+                ChatbotTraining.is_training_data == True
+            ).yield_per(2048)
+            
+            for user_query, user_feedback in interactions:
+                if user_feedback == 'positive':
+                    training_data.append((user_query, 'relevant'))
+                elif user_feedback == 'negative':
+                    training_data.append((user_query, 'irrelevant'))
             
             # Get data from knowledge base
-            kb_entries = KnowledgeBase.query.filter_by(topic=model_type).all()
-            for entry in kb_entries:
-                training_data.append({
-                    'text': entry.content,
-                    'label': 'relevant' if entry.confidence_score > 0.7 else 'uncertain'
-                })
+            kb_df = self._kb_snapshot().frame
+            kb_rows = kb_df.loc[kb_df['topic'] == model_type, ['content', 'confidence']]
+            labels = np.where(kb_rows['confidence'].to_numpy() > 0.7, 'relevant', 'uncertain')
+            training_data.extend(zip(kb_rows['content'].tolist(), labels.tolist()))
             
             # Add synthetic training data for better coverage
             synthetic_data = self.generate_synthetic_training_data(model_type)
@@ -334,21 +671,19 @@ class AIEngine:
                 "What's 2+2?"
             ]
             
-            for example in positive_examples:
-                synthetic_data.append({'text': example, 'label': 'relevant'})
-            
-            for example in negative_examples:
-                synthetic_data.append({'text': example, 'label': 'irrelevant'})
+            synthetic_data.extend((example, 'relevant') for example in positive_examples)
+            synthetic_data.extend((example, 'irrelevant') for example in negative_examples)
         
         return synthetic_data
     
     def predict_drug_properties(self, smiles, properties_to_predict):
         """Predict drug properties using trained models"""
         try:
-            if 'drug_discovery' not in self.models:
-                return {'error': 'Drug discovery model not available'}
+            with self._models_lock:
+                model_data = self.models.get('drug_discovery')
             
-            model_data = self.models['drug_discovery']
+            if model_data is None:
+                return {'error': 'Drug discovery model not available'}
             
             # Create input text from SMILES and properties
             input_text = f"SMILES: {smiles} Properties: {' '.join(properties_to_predict)}"
@@ -373,33 +708,101 @@ class AIEngine:
             logging.error(f"Error predicting drug properties: {e}")
             return {'error': str(e)}
     
+    def predict_relevance(self, texts):
+        """Label texts with the trained drug discovery model"""
+        with self._models_lock:
+            model_data = self.models.get('drug_discovery')
+        
+        if model_data is None or not texts:
+            return []
+        
+        # Bundles saved before hashing carry their own fitted vectorizer
+        if 'vectorizer' in model_data:
+            features = model_data['vectorizer'].transform(texts)
+        else:
+            features = model_data['tfidf'].transform(_HASHER.transform(texts))
+        
+        session = self._onnx_session(model_data)
+        if session is not None:
+            labels = session.run([session.get_outputs()[0].name], {'input': features.toarray().astype(np.float32)})[0]
+            return labels.tolist()
+        
+        # Gradient boosting only accepts dense input
+        if isinstance(model_data['model'], HistGradientBoostingClassifier):
+            features = features.toarray()
+        return model_data['model'].predict(features).tolist()
+    
+    def filter_by_predicted_relevance(self, entries):
+        """Keep the knowledge entries the trained model labels relevant; empty without a model"""
+        try:
+            labels = self.predict_relevance([entry['content'] for entry in entries])
+        except Exception as e:
+            logging.warning(f"Error predicting knowledge relevance: {e}")
+            return []
+        
+        return [entry for entry, label in zip(entries, labels) if label == 'relevant']
+    
+    def _onnx_session(self, model_data):
+        """Return the model's ONNX Runtime session, creating it on first use"""
+        if ort is None or not model_data.get('onnx_data'):
+            return None
+        
+        with self._models_lock:
+            if 'onnx_session' not in model_data:
+                try:
+                    model_data['onnx_session'] = ort.InferenceSession(
+                        model_data['onnx_data'], providers=['CPUExecutionProvider']
+                    )
+                except Exception as e:
+                    logging.error(f"Error loading ONNX model: {e}")
+                    model_data['onnx_session'] = None
+            return model_data['onnx_session']
+    
     def rule_based_property_prediction(self, smiles, properties):
         """Rule-based property prediction as fallback"""
+        # One pass over the SMILES bytes gives every single-character count
+        counts = np.bincount(np.frombuffer(smiles.encode('ascii', 'ignore'), dtype=np.uint8), minlength=128)
+        
+        # Rule-based toxicity flags, each counted once however often it occurs
+        toxicity_score = len(set(_TOX_FLAG_RE.findall(smiles)))
+        
+        return self._predictions_from_counts(
+            properties,
+            int(counts[ord('C')]), int(counts[ord('N')]), int(counts[ord('O')]),
+            int(counts[ord('S')]), int(counts[ord('c')]), toxicity_score
+        )
+    
+    def predict_batch(self, smiles_list, properties):
+        """Rule-based property predictions for many SMILES strings at once"""
+        if not smiles_list:
+            return []
+        
+        buffers = TypedList()
+        for smiles in smiles_list:
+            buffers.append(np.frombuffer(smiles.encode('ascii', 'ignore'), dtype=np.uint8))
+        
+        return [
+            self._predictions_from_counts(properties, carbon, nitrogen, oxygen, sulfur, aromatic, bin(alerts).count('1'))
+            for carbon, nitrogen, oxygen, sulfur, aromatic, alerts in _score_smiles_batch(buffers).tolist()
+        ]
+    
+    def _predictions_from_counts(self, properties, carbon_count, nitrogen_count, oxygen_count,
+                                 sulfur_count, aromatic_rings, toxicity_score):
+        """Apply the rule-based property formulas to precomputed SMILES counts"""
         predictions = {'confidence': 0.75}
         
         # Simple molecular weight estimation
         if 'molecular_weight' in properties:
-            # Count atoms (simplified)
-            carbon_count = smiles.count('C')
-            nitrogen_count = smiles.count('N')
-            oxygen_count = smiles.count('O')
-            sulfur_count = smiles.count('S')
-            
             mw = (carbon_count * 12) + (nitrogen_count * 14) + (oxygen_count * 16) + (sulfur_count * 32)
             predictions['molecular_weight'] = mw
         
         # Lipophilicity estimation
         if 'logp' in properties:
-            # Simple rule based on structure
-            aromatic_rings = smiles.count('c')
-            logp = (aromatic_rings * 0.5) + (smiles.count('C') * 0.1) - (smiles.count('O') * 0.2)
+            logp = (aromatic_rings * 0.5) + (carbon_count * 0.1) - (oxygen_count * 0.2)
             predictions['logp'] = round(logp, 2)
         
         # Toxicity prediction
         if 'toxicity' in properties:
-            # Rule-based toxicity flags
-            toxic_flags = ['[N+]', 'Cl', 'Br', 'S(=O)(=O)']
-            toxicity_score = sum([1 for flag in toxic_flags if flag in smiles])
             predictions['toxicity'] = 'High' if toxicity_score > 2 else 'Low'
         
         return predictions
@@ -414,8 +817,9 @@ class AIEngine:
             relevant_entries = self.find_relevant_knowledge(processed_query)
             
             if relevant_entries:
-                # Use the most relevant entry
-                best_entry = max(relevant_entries, key=lambda x: x['relevance_score'])
+                # Use the most relevant entry, preferring those the trained model labels relevant
+                candidates = self.filter_by_predicted_relevance(relevant_entries) or relevant_entries
+                best_entry = max(candidates, key=lambda x: x['relevance_score'])
                 response = self.generate_contextual_response(query, best_entry, context)
             else:
                 response = self.generate_fallback_response(query)
@@ -431,128 +835,130 @@ class AIEngine:
     
     def preprocess_text(self, text):
         """Preprocess text for analysis"""
-        # Convert to lowercase
-        text = text.lower()
+        # Keep single queries in the same token space as batch-processed corpora
+        if _spacy_pipeline() is not None:
+            return self.preprocess_batch([text])[0]
         
-        # Tokenize
-        tokens = word_tokenize(text)
+        tokens = _TOKEN_RE.findall(text.lower())
+        return ' '.join(self.stemmer.stem(token) for token in tokens if token not in self.stop_words)
+    
+    def preprocess_batch(self, texts):
+        """Preprocess many texts at once, lemmatising with spaCy when available"""
+        nlp = _spacy_pipeline()
+        if nlp is None:
+            return [self.preprocess_text(text) for text in texts]
         
-        # Remove stopwords and stem
-        processed_tokens = [
-            self.stemmer.stem(token) for token in tokens 
-            if token not in self.stop_words and token.isalpha()
+        return [
+            ' '.join(token.lemma_.lower() for token in doc if token.is_alpha and token.lower_ not in self.stop_words)
+            for doc in nlp.pipe(texts, batch_size=64)
         ]
-        
-        return ' '.join(processed_tokens)
     
-    def find_relevant_knowledge(self, query):
+    def find_relevant_knowledge(self, query, top_k=5):
         """Find relevant knowledge base entries"""
         relevant_entries = []
         
+        if not query:
+            return relevant_entries
+        
         try:
-            kb_entries = KnowledgeBase.query.all()
+            # Score against one snapshot, so rows and indexes always belong together
+            kb_index = self._kb_snapshot()
+            kb_df = kb_index.frame
+            if kb_df.empty:
+                return relevant_entries
             
-            for entry in kb_entries:
-                # Calculate relevance score
-                relevance_score = self.calculate_relevance(query, entry.content)
-                
-                if relevance_score > 0.3:  # Threshold for relevance
-                    relevant_entries.append({
-                        'content': entry.content,
-                        'topic': entry.topic,
-                        'keywords': json.loads(entry.keywords) if entry.keywords else [],
-                        'confidence': entry.confidence_score,
-                        'relevance_score': relevance_score
-                    })
+            if kb_index.matrix is not None:
+                # TF-IDF rows are L2-normalised, so one sparse product gives cosine similarity
+                query_vector = kb_index.vectorizer.transform([query])
+                scores = (kb_index.matrix @ query_vector.T).toarray().ravel()
+            else:
+                scores = self.calculate_relevance(query, kb_index)
+            
+            k = min(top_k, scores.size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            
+            top = top[np.argsort(-scores[top])]
+            top = top[scores[top] > 0.3]  # Threshold for relevance
+            
+            hits = kb_df.iloc[top][['content', 'topic', 'keywords', 'confidence']]
+            for entry, relevance_score in zip(hits.to_dict('records'), scores[top].tolist()):
+                entry['relevance_score'] = relevance_score
+                relevant_entries.append(entry)
             
         except Exception as e:
             logging.error(f"Error finding relevant knowledge: {e}")
         
-        return sorted(relevant_entries, key=lambda x: x['relevance_score'], reverse=True)
+        return relevant_entries
     
-    def calculate_relevance(self, query, content):
-        """Calculate relevance score between query and content"""
+    def calculate_relevance(self, query, kb_index=None):
+        """Calculate Jaccard relevance between the query and every entry of a knowledge index"""
+        if kb_index is None:
+            kb_index = self._kb_snapshot()
+        
         query_words = set(query.lower().split())
-        content_words = set(content.lower().split())
+        counts = np.zeros(len(kb_index.frame), dtype=np.int32)
         
-        # Jaccard similarity
-        intersection = len(query_words.intersection(content_words))
-        union = len(query_words.union(content_words))
+        # Each query token touches only the entries that contain it
+        for token in query_words:
+            positions = kb_index.postings.get(token)
+            if positions is not None:
+                counts[positions] += 1
         
-        return intersection / union if union > 0 else 0
+        union = kb_index.token_lens + len(query_words) - counts
+        return counts / np.maximum(union, 1)
     
     def generate_contextual_response(self, query, knowledge_entry, context):
         """Generate contextual response based on knowledge entry"""
         base_response = knowledge_entry['content']
         
         # Customize response based on query type
-        if any(word in query.lower() for word in ['predict', 'prediction', 'calculate']):
-            response = f"Based on current research data: {base_response}\n\nWould you like me to run specific predictions on your compound?"
-        elif any(word in query.lower() for word in ['toxicity', 'toxic', 'safety']):
-            response = f"Regarding safety considerations: {base_response}\n\nI recommend conducting thorough toxicity screening before proceeding."
-        elif any(word in query.lower() for word in ['optimize', 'improve', 'enhance']):
-            response = f"For optimization strategies: {base_response}\n\nI can analyze your compound structure and suggest specific modifications."
-        else:
-            response = base_response
+        template = _INTENT_TEMPLATES.get(_INTENT_MATCHER.route(query.lower(), default=None))
+        if template is None:
+            return base_response
         
-        return response
+        prefix, suffix = template
+        return f"{prefix}{base_response}{suffix}"
     
     def generate_fallback_response(self, query):
         """Generate fallback response when no knowledge is found"""
-        fallback_responses = {
-            'drug_discovery': "I understand you're asking about drug discovery. While I don't have specific information about your query, I can help you with molecular analysis, compound optimization, or toxicity prediction. Could you provide more details?",
-            'pharmacology': "Your question relates to pharmacology. I can assist with drug mechanisms, interactions, or ADMET properties. Please provide more specific details about what you'd like to know.",
-            'toxicology': "This appears to be a toxicology question. I can help predict potential toxicity issues or suggest safety testing approaches. What specific compound or concern are you investigating?",
-            'general': "I'm here to help with drug discovery and molecular analysis. Could you please rephrase your question or provide more context about what you're trying to achieve?"
-        }
-        
         # Determine category based on keywords
-        if any(word in query.lower() for word in ['drug', 'compound', 'molecule', 'discovery']):
-            return fallback_responses['drug_discovery']
-        elif any(word in query.lower() for word in ['pharmacology', 'mechanism', 'receptor']):
-            return fallback_responses['pharmacology']
-        elif any(word in query.lower() for word in ['toxic', 'safety', 'adverse']):
-            return fallback_responses['toxicology']
-        else:
-            return fallback_responses['general']
+        return _FALLBACK_RESPONSES[_FALLBACK_MATCHER.route(query.lower())]
     
     def store_interaction(self, query, response, context):
-        """Store chatbot interaction for future training"""
+        """Queue chatbot interaction for future training"""
+        # Serialisation and the database write happen on the writer thread
+        if not self._interaction_writer.put((query, response, context)):
+            logging.warning("Interaction queue is full, dropping chatbot interaction")
+    
+    def flush_interactions(self):
+        """Write every queued chatbot interaction now"""
+        self._interaction_writer.flush()
+    
+    def _write_interactions(self, batch):
+        """Store a batch of chatbot interactions in a single bulk insert"""
+        created_at = datetime.utcnow()
+        interactions = [
+            {
+                'user_query': query,
+                'bot_response': response,
+                'context_data': dumps(context) if context else None,
+                'topic_category': self.classify_topic(query),
+                'response_accuracy': 0.8,  # Default confidence
+                'created_at': created_at
+            }
+            for query, response, context in batch
+        ]
+        
         try:
-            # Determine topic category
-            topic_category = self.classify_topic(query)
-            
-            interaction = ChatbotTraining(
-                user_query=query,
-                bot_response=response,
-                context_data=json.dumps(context) if context else None,
-                topic_category=topic_category,
-                response_accuracy=0.8  # Default confidence
-            )
-            
-            db.session.add(interaction)
+            db.session.bulk_insert_mappings(ChatbotTraining, interactions)
             db.session.commit()
-            
         except Exception as e:
-            logging.error(f"Error storing interaction: {e}")
+            logging.error(f"Error storing interactions: {e}")
             db.session.rollback()
     
     def classify_topic(self, query):
         """Classify query topic for training purposes"""
-        drug_keywords = ['drug', 'compound', 'molecule', 'synthesis', 'discovery']
-        pharma_keywords = ['pharmacology', 'mechanism', 'receptor', 'binding']
-        tox_keywords = ['toxic', 'toxicity', 'safety', 'adverse', 'side effect']
-        
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in drug_keywords):
-            return 'drug_discovery'
-        elif any(word in query_lower for word in pharma_keywords):
-            return 'pharmacology'
-        elif any(word in query_lower for word in tox_keywords):
-            return 'toxicology'
-        else:
-            return 'general'
+        return _TOPIC_MATCHER.route(query.lower())
     
     def retrain_models(self):
         """Retrain all models with new data"""
@@ -574,21 +980,36 @@ class AIEngine:
         logging.info(f"Model retraining completed. {success_count}/{len(models_to_train)} models updated successfully.")
         return success_count == len(models_to_train)
 
-# Global AI engine instance will be initialized later
+# Global AI engine instance, created on first use by _engine()
 ai_engine = None
+_engine_lock = threading.Lock()
+_ai_ready = threading.Event()
+
+def _engine():
+    """Return the shared AI engine, creating it once on first use"""
+    global ai_engine
+    engine = ai_engine
+    if engine is not None:
+        return engine
+    
+    # Only the first caller pays for initialization; later ones see the instance
+    with _engine_lock:
+        if ai_engine is None:
+            ai_engine = AIEngine()
+        return ai_engine
 
 def initialize_ai_system():
     """Initialize the AI system with training data"""
-    global ai_engine
     try:
         logging.info("Initializing AI system...")
         
         # Initialize AI engine with proper context
-        ai_engine = AIEngine()
+        engine = _engine()
         
         # Train initial models
-        ai_engine.train_drug_discovery_model()
+        engine.train_drug_discovery_model()
         
+        _ai_ready.set()
         logging.info("AI system initialized successfully")
         return True
         
@@ -596,13 +1017,21 @@ def initialize_ai_system():
         logging.error(f"Error initializing AI system: {e}")
         return False
 
+def ai_ready():
+    """Return whether the AI system has finished initializing"""
+    return _ai_ready.is_set()
+
+def retrain_ai_models():
+    """Retrain the AI engine's models"""
+    return _engine().retrain_models()
+
 def get_ai_prediction(compound_data, prediction_type):
     """Get AI prediction for compound"""
-    return ai_engine.predict_drug_properties(
+    return _engine().predict_drug_properties(
         compound_data.get('smiles', ''), 
         [prediction_type]
     )
 
 def get_chatbot_response(message, context=None):
     """Get chatbot response"""
-    return ai_engine.get_ai_response(message, context)
\ No newline at end of file
+    return _engine().get_ai_response(message, context)
@@ -1,14 +1,19 @@
 import os
 import logging
-from flask import Flask
+import threading
+from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_socketio import SocketIO
+from sqlalchemy import Text, inspect
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 from werkzeug.middleware.proxy_fix import ProxyFix
+from json_utils import dumps, loads
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; LOG_LEVEL=DEBUG restores verbose output
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
 class Base(DeclarativeBase):
     pass
@@ -18,6 +23,57 @@ db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
 socketio = SocketIO()
 
+def _engine_options(database_url):
+    """Build SQLAlchemy engine options for the configured database and async mode"""
+    options = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        # JSON columns encode and decode through orjson when it is installed
+        "json_serializer": dumps,
+        "json_deserializer": loads,
+    }
+    
+    if os.environ.get("ASYNC_MODE") in ("gevent", "eventlet"):
+        # Pooled connections must not be shared across greenlets
+        options["poolclass"] = NullPool
+    elif not database_url.startswith("sqlite:///:memory:") and database_url != "sqlite://":
+        # Size the pool for concurrent chatbot writes and SocketIO handlers
+        options["pool_size"] = int(os.environ.get("DB_POOL_SIZE", 20))
+        options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", 40))
+        options["pool_timeout"] = 10
+    
+    if database_url.startswith("sqlite"):
+        # Background writers share the file, so wait for locks rather than failing
+        options["connect_args"] = {"timeout": 30}
+    elif database_url.startswith(("postgres://", "postgresql")):
+        # Stop runaway queries from holding a connection
+        options["connect_args"] = {"options": "-c statement_timeout=5000"}
+    
+    return options
+
+def _missing_tables():
+    """Return the model tables not yet present in the database, in one introspection query"""
+    return set(db.metadata.tables) - set(inspect(db.engine).get_table_names())
+
+def _upgrade_model_data_column():
+    """Convert ai_model.model_data from the old text type to binary, dropping text-era pickles"""
+    # SQLite stores the joblib bytes whatever the declared column type
+    if db.engine.dialect.name != 'postgresql':
+        return
+    
+    column_types = {column['name']: column['type'] for column in inspect(db.engine).get_columns('ai_model')}
+    if isinstance(column_types.get('model_data'), Text):
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("ALTER TABLE ai_model ALTER COLUMN model_data TYPE bytea USING NULL")
+        logging.info("Converted ai_model.model_data to bytea; stored models will be retrained")
+
+def _create_missing_indexes(*tables):
+    """Create indexes declared on tables that already existed before the indexes were added"""
+    with db.engine.begin() as connection:
+        for table in tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
 def create_app():
     app = Flask(__name__)
     
@@ -25,10 +81,7 @@ def create_app():
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
     app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///mutasight.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "pool_recycle": 300,
-        "pool_pre_ping": True,
-    }
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
     
     # Configure upload folder
     app.config['UPLOAD_FOLDER'] = 'uploads'
@@ -47,20 +100,78 @@ def create_app():
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
     
-    socketio.init_app(app, cors_allowed_origins="*")
+    # ALLOWED_ORIGINS is a comma-separated list; ASYNC_MODE pins eventlet/gevent
+    # when they are installed, otherwise the best available mode is detected
+    allowed_origins = os.environ.get("ALLOWED_ORIGINS", "*")
+    socketio.init_app(
+        app,
+        cors_allowed_origins=allowed_origins if allowed_origins == "*" else [
+            origin.strip() for origin in allowed_origins.split(",")
+        ],
+        async_mode=os.environ.get("ASYNC_MODE") or None,
+        http_compression=True,
+        compression_threshold=512,
+    )
     
-    # Create tables
-    with app.app_context():
-        import models  # noqa: F401
+    # Register blueprints
+    from auth import auth_bp
+    from routes import main_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(main_bp)
+    # NOTE: When using url_for in templates, reference endpoints as 'main.endpoint_name' for routes in main_bp
+    
+    # Database setup runs on the first request so create_app returns straight away
+    # and the process answers health checks before the warm work is done
+    app.extensions['warmup_done'] = False
+    warmup_lock = threading.Lock()
+    
+    @app.before_request
+    def warmup_once():
+        if app.extensions['warmup_done'] or request.endpoint == 'live':
+            return
+        with warmup_lock:
+            if not app.extensions['warmup_done']:
+                _warmup(app)
+                app.extensions['warmup_done'] = True
+    
+    @app.route('/live')
+    def live():
+        """Liveness check for load balancers, answered without waiting on warmup"""
+        return {'status': 'ok'}
+
+    return app
+
+def _warmup(app):
+    """Create tables, seed default data and start the AI bootstrap"""
+    import models
+    
+    # RUN_DDL=1 forces create_all and RUN_DDL=0 skips it (schema managed by
+    # the deploy step); otherwise only run it when a table is missing
+    run_ddl = os.environ.get("RUN_DDL")
+    if run_ddl == "1" or (run_ddl != "0" and _missing_tables()):
         db.create_all()
-        
-        # Initialize default data
-        from data.drug_database import initialize_drug_data
-        from data.excipients_data import initialize_excipients_data
-        initialize_drug_data()
-        initialize_excipients_data()
-        
-        # Initialize AI system and comprehensive database
+    
+    # Bring tables created by older versions up to the current models
+    if run_ddl != "0":
+        _upgrade_model_data_column()
+        _create_missing_indexes(models.UserSession.__table__, models.KnowledgeBase.__table__)
+    
+    # Initialize default data
+    from data.drug_database import initialize_drug_data
+    from data.excipients_data import initialize_excipients_data
+    initialize_drug_data()
+    initialize_excipients_data()
+    
+    logging.info("Database tables created and initialized")
+    
+    # Initialize AI system and comprehensive database in the background so requests
+    # aren't blocked on model training and scraping
+    threading.Thread(target=_bootstrap_ai, args=(app,), name='ai-bootstrap', daemon=True).start()
+
+def _bootstrap_ai(app):
+    """Initialize the AI system and comprehensive database off the startup path"""
+    with app.app_context():
         try:
             from ai_engine import initialize_ai_system
             from data_scraper import initialize_comprehensive_database
@@ -74,23 +185,18 @@ def create_app():
             logging.info("AI system and comprehensive database initialized")
         except Exception as e:
             logging.error(f"Error initializing AI system: {e}")
-        
-        logging.info("Database tables created and initialized")
-    
-    # Register blueprints
-    from auth import auth_bp
-    from routes import main_bp
-
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(main_bp)
-    # NOTE: When using url_for in templates, reference endpoints as 'main.endpoint_name' for routes in main_bp
-
-    return app
 
 # Create app instance
 app = create_app()
 
 @login_manager.user_loader
 def load_user(user_id):
+    from flask import g
     from models import User
-    return User.query.get(int(user_id))
+    
+    # current_user may be resolved many times per request or socket event
+    cache = g.setdefault('_user_cache', {})
+    user_id = int(user_id)
+    if user_id not in cache:
+        cache[user_id] = db.session.get(User, user_id)
+    return cache[user_id]
@@ -0,0 +1,105 @@
+"""
+Batched Database Writes for MutaSight AI Platform
+Queues rows on the request path and writes them from a background thread
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+# Queued on close() to tell the writer thread to stop
+_STOP = object()
+
+
+class BatchWriter:
+    """Background writer that hands queued items to a callback in batches"""
+
+    def __init__(self, app, write_batch, batch_size=100, flush_interval=2, maxsize=10000, name='batch-writer'):
+        self.app = app
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        # Don't lose queued items when the process exits
+        atexit.register(self.close)
+
+    def put(self, item):
+        """Queue an item for writing; return False if the queue is full"""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self):
+        """Write every queued item now, in the caller's app context, and wait for any batch
+        the writer thread is already writing"""
+        while True:
+            batch, _ = self._next_batch(block=False)
+            if not batch:
+                break
+            self._write(batch)
+        
+        # Every taken item is marked done once written, so this returns after the in-flight batch
+        self._queue.join()
+
+    def close(self):
+        """Stop the writer thread and write whatever is still queued"""
+        # Let the writer finish the batch it is holding before draining the rest
+        try:
+            self._queue.put(_STOP, timeout=1)
+            self._thread.join(timeout=5)
+        except queue.Full:
+            pass
+
+        with self.app.app_context():
+            self.flush()
+
+    def _next_batch(self, block):
+        """Take up to one batch of queued items, and whether close() was called"""
+        batch = []
+        deadline = None
+        try:
+            while len(batch) < self.batch_size:
+                if not block:
+                    item = self._queue.get_nowait()
+                elif batch:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                else:
+                    item = self._queue.get()
+                    
+                    # The flush interval runs from the first item, not from when the wait began
+                    deadline = time.monotonic() + self.flush_interval
+
+                if item is _STOP:
+                    self._queue.task_done()
+                    return batch, True
+                batch.append(item)
+        except queue.Empty:
+            pass
+        return batch, False
+
+    def _write(self, batch):
+        """Hand a batch to the write callback, logging rather than raising failures"""
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            logging.error(f"Error writing batch of {len(batch)} items: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        """Background loop draining the queue into the write callback"""
+        while True:
+            batch, stop = self._next_batch(block=True)
+            if batch:
+                with self.app.app_context():
+                    self._write(batch)
+            if stop:
+                return
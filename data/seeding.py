@@ -0,0 +1,115 @@
+"""
+Seed Data Loading for MutaSight AI Platform
+Shared helpers for bulk loading the static drug and excipient datasets
+"""
+
+import csv
+import io
+import os
+import sys
+from contextlib import contextmanager
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from json_utils import dumps, loads
+
+_DATA_DIR = os.path.dirname(__file__)
+
+def load_seed_file(filename):
+    """Read a JSON seed dataset from the data directory"""
+    with open(os.path.join(_DATA_DIR, filename), 'rb') as f:
+        return loads(f.read())
+
+def intern_fields(rows, fields):
+    """Share one string object per repeated value of fields, including values inside JSON objects"""
+    for row in rows:
+        for field in fields:
+            value = row.get(field)
+            if isinstance(value, str):
+                row[field] = sys.intern(value)
+            elif isinstance(value, dict):
+                row[field] = {
+                    key: sys.intern(item) if isinstance(item, str) else item for key, item in value.items()
+                }
+
+@contextmanager
+def unsynced_transaction():
+    """Open a transaction whose commit doesn't wait on a disk sync; only for idempotent seeding"""
+    with db.engine.connect() as connection:
+        dialect = connection.dialect.name
+        if dialect == 'sqlite':
+            # SQLite's safety level is per connection and can't change inside a transaction
+            previous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+            connection.exec_driver_sql("PRAGMA synchronous = OFF")
+            connection.commit()
+        
+        try:
+            with connection.begin():
+                if dialect == 'postgresql':
+                    # Scoped to this transaction, so the pooled connection is unaffected
+                    connection.exec_driver_sql("SET LOCAL synchronous_commit = OFF")
+                yield connection
+        finally:
+            if dialect == 'sqlite':
+                connection.exec_driver_sql(f"PRAGMA synchronous = {previous}")
+                connection.commit()
+
+def _csv_value(value):
+    """Render a column value for COPY's CSV input"""
+    return dumps(value) if isinstance(value, (dict, list)) else value
+
+def copy_rows(connection, table, rows, conflict_column=None):
+    """Stream rows into a Postgres table with COPY, skipping rows whose conflict_column
+    value already exists; return the number inserted"""
+    columns = ', '.join(column.name for column in table.columns if column.name in rows[0])
+    
+    # COPY can't skip conflicts, so load a temporary table and insert from it
+    target = table.name
+    if conflict_column:
+        target = f"{table.name}_staging"
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE {target} ON COMMIT DROP AS SELECT {columns} FROM {table.name} WITH NO DATA"
+        )
+    
+    # Unquoted empty CSV fields load as NULL; JSON column values are serialised here
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [_csv_value(row.get(column)) for column in columns.split(', ')] for row in rows
+    )
+    buffer.seek(0)
+    
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {target} ({columns}) FROM STDIN WITH CSV", buffer)
+    finally:
+        cursor.close()
+    
+    if not conflict_column:
+        return len(rows)
+    
+    result = connection.exec_driver_sql(
+        f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {target} "
+        f"ON CONFLICT ({conflict_column}) DO NOTHING"
+    )
+    return result.rowcount
+
+def insert_rows(connection, table, rows, conflict_column):
+    """Insert seed rows, skipping those whose conflict_column value is already present; return the number inserted"""
+    # Databases created before the unique index was added don't have it yet
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+    
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        return copy_rows(connection, table, rows, conflict_column)
+    
+    if dialect == 'sqlite':
+        statement = sqlite_insert(table).on_conflict_do_nothing(index_elements=[conflict_column])
+    elif connection.execute(select(1).select_from(table).limit(1)).first():
+        # No portable conflict clause, so only seed an empty table
+        return 0
+    else:
+        statement = insert(table)
+    
+    # Insert all rows in one executemany rather than one ORM add per row
+    return connection.execute(statement, rows).rowcount
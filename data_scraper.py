@@ -1,14 +1,303 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import os
+import threading
 import time
 import logging
-from datetime import datetime
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import trafilatura
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from operator import itemgetter
+from flask import current_app
+from sqlalchemy import func, insert
 from app import db
 from models import DrugData, KnowledgeBase, DrugInteraction
-import re
+from keyword_matcher import KeywordMatcher
+from json_utils import dumps, loads
+
+# Cached source responses are served as-is for this long, then refreshed in the background
+CACHE_MAX_AGE = 24 * 60 * 60
+
+# Full scrapes recorded in the cache manifest are skipped until they are this old
+SCRAPE_INTERVAL = 24 * 60 * 60
+
+# Drug lookups (and so PubChem requests) in flight at once when updating the drug database
+PUBCHEM_CONCURRENCY = 8
+
+# PubChem's usage policy allows at most this many requests per second
+PUBCHEM_RATE_LIMIT = 5
+
+# PubChem property labels read by scrape_pubchem_data
+PUBCHEM_PROPERTIES = frozenset({'Molecular Formula', 'Molecular Weight', 'SMILES', 'InChI'})
+
+# Drugs update_drug_database makes sure are in the database
+_COMMON_DRUGS = [
+    'aspirin', 'ibuprofen', 'acetaminophen', 'metformin', 'atorvastatin',
+    'lisinopril', 'amlodipine', 'omeprazole', 'levothyroxine', 'albuterol',
+    'hydrochlorothiazide', 'losartan', 'gabapentin', 'furosemide', 'prednisone'
+]
+
+# Common pharmaceutical compounds served by scrape_drugbank_info
+_DRUG_DATABASE = {
+    'aspirin': {
+        'generic_name': 'acetylsalicylic acid',
+        'brand_names': ['Aspirin', 'Bayer', 'Bufferin'],
+        'smiles': 'CC(=O)OC1=CC=CC=C1C(=O)O',
+        'molecular_formula': 'C9H8O4',
+        'molecular_weight': 180.16,
+        'therapeutic_class': 'NSAID',
+        'mechanism_of_action': 'Irreversibly inhibits cyclooxygenase-1 and cyclooxygenase-2 (COX-1 and COX-2) enzymes',
+        'indications': 'Pain relief, fever reduction, anti-inflammatory, cardiovascular protection',
+        'contraindications': 'Bleeding disorders, severe asthma, children with viral infections',
+        'side_effects': 'Gastrointestinal bleeding, tinnitus, allergic reactions'
+    },
+    'ibuprofen': {
+        'generic_name': 'ibuprofen',
+        'brand_names': ['Advil', 'Motrin', 'Nurofen'],
+        'smiles': 'CC(C)CC1=CC=C(C=C1)C(C)C(=O)O',
+        'molecular_formula': 'C13H18O2',
+        'molecular_weight': 206.29,
+        'therapeutic_class': 'NSAID',
+        'mechanism_of_action': 'Reversibly inhibits cyclooxygenase enzymes (COX-1 and COX-2)',
+        'indications': 'Pain, fever, inflammation',
+        'contraindications': 'Severe heart failure, active GI bleeding, severe renal impairment',
+        'side_effects': 'Nausea, dyspepsia, GI bleeding, headache'
+    },
+    'metformin': {
+        'generic_name': 'metformin hydrochloride',
+        'brand_names': ['Glucophage', 'Fortamet', 'Glumetza'],
+        'smiles': 'CN(C)C(=N)N=C(N)N',
+        'molecular_formula': 'C4H11N5',
+        'molecular_weight': 129.16,
+        'therapeutic_class': 'Antidiabetic (Biguanide)',
+        'mechanism_of_action': 'Decreases hepatic glucose production, increases insulin sensitivity',
+        'indications': 'Type 2 diabetes mellitus, polycystic ovary syndrome',
+        'contraindications': 'Severe renal impairment, metabolic acidosis, diabetic ketoacidosis',
+        'side_effects': 'Nausea, diarrhea, metallic taste, lactic acidosis (rare)'
+    },
+    'atorvastatin': {
+        'generic_name': 'atorvastatin calcium',
+        'brand_names': ['Lipitor', 'Torvast', 'Atorlip'],
+        'smiles': 'CC(C)C1=C(C(=C(N1CC[C@H](C[C@H](CC(=O)O)O)O)C2=CC=C(C=C2)F)C3=CC=CC=C3)C(=O)NC4=CC=CC=C4',
+        'molecular_formula': 'C33H35FN2O5',
+        'molecular_weight': 558.64,
+        'therapeutic_class': 'HMG-CoA Reductase Inhibitor (Statin)',
+        'mechanism_of_action': 'Inhibits HMG-CoA reductase, reducing cholesterol synthesis',
+        'indications': 'Hypercholesterolemia, cardiovascular disease prevention',
+        'contraindications': 'Active liver disease, pregnancy, breastfeeding',
+        'side_effects': 'Muscle pain, liver enzyme elevation, diabetes risk'
+    },
+    'lisinopril': {
+        'generic_name': 'lisinopril',
+        'brand_names': ['Prinivil', 'Zestril', 'Qbrelis'],
+        'smiles': 'CCCCN1CCCC1C(=O)N[C@@H](CCc2ccccc2)C(=O)N3CCC[C@H]3C(=O)O',
+        'molecular_formula': 'C21H31N3O5',
+        'molecular_weight': 405.49,
+        'therapeutic_class': 'ACE Inhibitor',
+        'mechanism_of_action': 'Inhibits angiotensin-converting enzyme, reducing vasoconstriction',
+        'indications': 'Hypertension, heart failure, post-myocardial infarction',
+        'contraindications': 'Angioedema history, bilateral renal artery stenosis, pregnancy',
+        'side_effects': 'Dry cough, hyperkalemia, angioedema, hypotension'
+    }
+}
+
+# Drug keys in lookup order; an earlier key wins when several match
+_DRUG_KEYS = tuple(_DRUG_DATABASE)
+
+# Finds every drug key occurring in a name in one regex pass
+_DRUG_KEY_MATCHER = KeywordMatcher({drug_key: (drug_key,) for drug_key in _DRUG_KEYS})
+
+# Lowercased generic names joined into one string, so a name is found inside any of them with a
+# single str.find; offsets map a match position back to its drug
+_GENERIC_NAMES = '\n'.join(_DRUG_DATABASE[drug_key]['generic_name'].lower() for drug_key in _DRUG_KEYS)
+_GENERIC_NAME_OFFSETS = tuple(accumulate(
+    (len(_DRUG_DATABASE[drug_key]['generic_name']) + 1 for drug_key in _DRUG_KEYS[:-1]), initial=0
+))
+
+# Known pharmaceutical interactions served by scrape_drug_interactions
+_INTERACTIONS_DB = {
+    ('aspirin', 'warfarin'): {
+        'interaction_type': 'major',
+        'description': 'Increased risk of bleeding due to additive anticoagulant effects',
+        'clinical_significance': 'Monitor INR closely, consider dose adjustment',
+        'mechanism': 'Aspirin inhibits platelet aggregation while warfarin inhibits coagulation cascade',
+        'management': 'Monitor for signs of bleeding, frequent INR monitoring',
+        'severity_level': 4,
+        'evidence_level': 'established'
+    },
+    ('metformin', 'contrast_media'): {
+        'interaction_type': 'moderate',
+        'description': 'Risk of lactic acidosis in patients with renal impairment',
+        'clinical_significance': 'Discontinue metformin before contrast procedures',
+        'mechanism': 'Contrast media can cause acute renal failure, leading to metformin accumulation',
+        'management': 'Hold metformin 48 hours before and after contrast administration',
+        'severity_level': 3,
+        'evidence_level': 'established'
+    },
+    ('atorvastatin', 'grapefruit'): {
+        'interaction_type': 'moderate',
+        'description': 'Grapefruit juice increases atorvastatin concentration',
+        'clinical_significance': 'Increased risk of myopathy and rhabdomyolysis',
+        'mechanism': 'Grapefruit juice inhibits CYP3A4 enzyme',
+        'management': 'Avoid grapefruit juice or consider alternative statin',
+        'severity_level': 3,
+        'evidence_level': 'established'
+    }
+}
+
+# Interactions keyed by their unordered drug pair, with their position in _INTERACTIONS_DB so the
+# earliest listed interaction still wins when a name contains several drugs
+_INTERACTIONS_BY_PAIR = {
+    frozenset(pair): (position, interaction)
+    for position, (pair, interaction) in reversed(list(enumerate(_INTERACTIONS_DB.items())))
+}
+
+# Finds every interacting drug occurring in a name in one regex pass
+_INTERACTION_DRUG_MATCHER = KeywordMatcher({drug: (drug,) for pair in _INTERACTIONS_DB for drug in pair})
+
+# Medical knowledge base covering key drug discovery topics
+_MEDICAL_KNOWLEDGE = {
+    'drug_discovery': [
+        {
+            'title': 'Modern Drug Discovery Process',
+            'content': 'Drug discovery is a complex process involving target identification, hit identification, lead optimization, and preclinical development. Modern approaches integrate computational methods, high-throughput screening, and structure-based drug design to accelerate the discovery of new therapeutic agents.',
+            'keywords': ['drug discovery', 'target identification', 'lead optimization', 'preclinical development'],
+            'confidence': 0.95
+        },
+        {
+            'title': 'ADMET Properties in Drug Development',
+            'content': 'ADMET (Absorption, Distribution, Metabolism, Excretion, Toxicity) properties are critical determinants of drug success. Early assessment of ADMET properties can prevent late-stage failures and reduce development costs. In silico ADMET prediction tools have become essential in modern drug discovery.',
+            'keywords': ['ADMET', 'pharmacokinetics', 'drug metabolism', 'toxicity', 'in silico'],
+            'confidence': 0.92
+        }
+    ],
+    'pharmacology': [
+        {
+            'title': 'Receptor-Drug Interactions',
+            'content': 'Drug-receptor interactions form the basis of pharmacological action. Understanding binding kinetics, selectivity, and functional selectivity is crucial for developing effective therapeutics with minimal side effects. Structure-activity relationships guide optimization of drug-receptor interactions.',
+            'keywords': ['drug-receptor', 'binding kinetics', 'selectivity', 'SAR'],
+            'confidence': 0.90
+        },
+        {
+            'title': 'Pharmacokinetic Modeling',
+            'content': 'Pharmacokinetic modeling describes drug absorption, distribution, metabolism, and elimination. Population pharmacokinetic models help predict drug behavior in different patient populations and guide dosing strategies. PBPK modeling integrates physiological parameters for more accurate predictions.',
+            'keywords': ['pharmacokinetics', 'population PK', 'PBPK modeling', 'dosing'],
+            'confidence': 0.88
+        }
+    ],
+    'toxicology': [
+        {
+            'title': 'Predictive Toxicology Methods',
+            'content': 'Predictive toxicology uses computational and in vitro methods to assess potential adverse effects early in drug development. QSAR models, read-across approaches, and organ-on-chip technologies provide alternatives to animal testing while improving prediction accuracy.',
+            'keywords': ['predictive toxicology', 'QSAR', 'read-across', 'organ-on-chip'],
+            'confidence': 0.87
+        },
+        {
+            'title': 'Hepatotoxicity Assessment',
+            'content': 'Drug-induced liver injury (DILI) is a major cause of drug withdrawal from the market. Early identification of hepatotoxic potential through biomarkers, in vitro models, and computational predictions is essential for drug safety assessment.',
+            'keywords': ['hepatotoxicity', 'DILI', 'biomarkers', 'drug safety'],
+            'confidence': 0.85
+        }
+    ]
+}
+
+# URLs currently being refreshed, so each stale entry is fetched only once
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+@dataclass(slots=True, frozen=True)
+class PubChemRecord:
+    """Compound properties parsed from a PubChem response"""
+    name: str
+    molecular_formula: str = ''
+    molecular_weight: float = 0.0
+    smiles: str = ''
+    inchi: str = ''
+    source: str = 'PubChem'
+    
+    def get(self, field, default=None):
+        """Read a field like dict.get, so records and local drug entries share one row builder"""
+        return getattr(self, field, default)
+
+class TokenBucket:
+    """Thread-safe token bucket spacing requests to an average rate, allowing short bursts"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, sleeping until it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            
+            # Tokens go negative to reserve future ones, so waiters are served in order
+            # without holding the lock while they sleep
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+        
+        if wait > 0:
+            time.sleep(wait)
+
+# Shared by every scraper and background refresh, since the limit is per client
+_pubchem_bucket = TokenBucket(PUBCHEM_RATE_LIMIT, capacity=PUBCHEM_RATE_LIMIT)
+
+def _cache_dir():
+    """Return the on-disk scraper cache directory, creating it if needed"""
+    path = os.environ.get('SCRAPER_CACHE_DIR') or os.path.join(current_app.instance_path, 'scraper_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _write_json_atomic(path, data):
+    """Write JSON to path via a temporary file so readers never see a partial file"""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(dumps(data))
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    """Read a JSON file, returning None if it is missing or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+@lru_cache(maxsize=1024)
+def _match_drug_key(name):
+    """Return the first drug key occurring in name or whose generic name contains name, or None"""
+    matches = []
+    
+    drug_key = _DRUG_KEY_MATCHER.route(name, default=None)
+    if drug_key:
+        matches.append(_DRUG_KEYS.index(drug_key))
+    
+    # A name spanning the separator would match across two generic names
+    position = _GENERIC_NAMES.find(name) if '\n' not in name else -1
+    if position >= 0:
+        matches.append(bisect_right(_GENERIC_NAME_OFFSETS, position) - 1)
+    
+    return _DRUG_KEYS[min(matches)] if matches else None
+
+@lru_cache(maxsize=1024)
+def _match_interaction(drug1, drug2):
+    """Return the known interaction between two lowercased drug names, or None"""
+    # Look up each pair of drugs found in the two names rather than testing every interaction
+    matches = (
+        _INTERACTIONS_BY_PAIR.get(frozenset((d1, d2)))
+        for d1 in _INTERACTION_DRUG_MATCHER.matches(drug1)
+        for d2 in _INTERACTION_DRUG_MATCHER.matches(drug2)
+    )
+    return min(filter(None, matches), key=itemgetter(0), default=(None, None))[1]
 
 class DrugDiscoveryDataScraper:
     """Advanced web scraper for drug discovery data from reliable sources"""
@@ -18,8 +307,73 @@ class DrugDiscoveryDataScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Keep enough pooled keep-alive connections for a concurrent batch, and
+        # retry throttled or failed requests with backoff
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=2 * PUBCHEM_CONCURRENCY,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.scraped_data = {}
         self.knowledge_entries = []
+        self.cache_dir = _cache_dir()
+    
+    def _cache_path(self, url):
+        """Return the cache file for a source URL"""
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + '.json')
+    
+    def _fetch_and_cache(self, url):
+        """Fetch a JSON source and store it in the cache; return None if it is missing or on failure"""
+        try:
+            # Only requests that actually reach the network count against the rate limit
+            _pubchem_bucket.acquire()
+            response = self.session.get(url, timeout=10)
+            if response.status_code == 404:
+                # Cache "not found" too, so unknown names aren't re-requested on every update
+                data = None
+            elif response.status_code != 200:
+                return None
+            else:
+                data = loads(response.content)
+        except Exception:
+            logging.exception("Error fetching %s", url)
+            return None
+        
+        try:
+            _write_json_atomic(self._cache_path(url), {'fetched_at': time.time(), 'data': data})
+        except OSError:
+            logging.exception("Error caching %s", url)
+        return data
+    
+    def _refresh_in_background(self, url):
+        """Refresh a stale cache entry on a background thread"""
+        with _refreshing_lock:
+            if url in _refreshing:
+                return
+            _refreshing.add(url)
+        
+        def refresh():
+            try:
+                self._fetch_and_cache(url)
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(url)
+        
+        threading.Thread(target=refresh, name='scraper-refresh', daemon=True).start()
+    
+    def fetch_json(self, url):
+        """Fetch a JSON source with stale-while-revalidate caching on disk"""
+        cached = _read_json(self._cache_path(url))
+        if cached is None:
+            return self._fetch_and_cache(url)
+        
+        # Serve the last known good copy; refresh it off the request path once it is old
+        if time.time() - cached['fetched_at'] > CACHE_MAX_AGE:
+            self._refresh_in_background(url)
+        return cached['data']
         
     def scrape_pubchem_data(self, compound_name):
         """Scrape compound data from PubChem"""
@@ -27,386 +381,242 @@ class DrugDiscoveryDataScraper:
             # PubChem REST API endpoints
             search_url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{compound_name}/JSON"
             
-            response = self.session.get(search_url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = self.fetch_json(search_url)
+            if data and 'PC_Compounds' in data:
+                compound_data = data['PC_Compounds'][0]
                 
-                if 'PC_Compounds' in data:
-                    compound_data = data['PC_Compounds'][0]
+                # Extract the properties we store, reading each prop's label and value once
+                properties = {}
+                for prop in compound_data.get('props', ()):
+                    label = prop.get('urn', {}).get('label')
+                    if label not in PUBCHEM_PROPERTIES:
+                        continue
                     
-                    # Extract properties
-                    properties = {}
-                    if 'props' in compound_data:
-                        for prop in compound_data['props']:
-                            if 'urn' in prop and 'label' in prop['urn']:
-                                label = prop['urn']['label']
-                                
-                                if 'sval' in prop['value']:
-                                    properties[label] = prop['value']['sval']
-                                elif 'fval' in prop['value']:
-                                    properties[label] = prop['value']['fval']
-                    
-                    return {
-                        'name': compound_name,
-                        'molecular_formula': properties.get('Molecular Formula', ''),
-                        'molecular_weight': properties.get('Molecular Weight', 0),
-                        'smiles': properties.get('SMILES', ''),
-                        'inchi': properties.get('InChI', ''),
-                        'source': 'PubChem'
-                    }
+                    value = prop.get('value', {})
+                    value = value.get('sval', value.get('fval'))
+                    if value is not None:
+                        properties[label] = value
+                
+                return PubChemRecord(
+                    name=compound_name,
+                    molecular_formula=properties.get('Molecular Formula', ''),
+                    molecular_weight=float(properties.get('Molecular Weight', 0)),
+                    smiles=properties.get('SMILES', ''),
+                    inchi=properties.get('InChI', '')
+                )
             
-        except Exception as e:
-            logging.error(f"Error scraping PubChem data for {compound_name}: {e}")
+        except Exception:
+            logging.exception("Error scraping PubChem data for %s", compound_name)
         
         return None
     
     def scrape_drugbank_info(self, drug_name):
         """Scrape drug information from public drug databases"""
-        try:
-            # Create comprehensive drug data based on common pharmaceutical compounds
-            drug_database = {
-                'aspirin': {
-                    'generic_name': 'acetylsalicylic acid',
-                    'brand_names': ['Aspirin', 'Bayer', 'Bufferin'],
-                    'smiles': 'CC(=O)OC1=CC=CC=C1C(=O)O',
-                    'molecular_formula': 'C9H8O4',
-                    'molecular_weight': 180.16,
-                    'therapeutic_class': 'NSAID',
-                    'mechanism_of_action': 'Irreversibly inhibits cyclooxygenase-1 and cyclooxygenase-2 (COX-1 and COX-2) enzymes',
-                    'indications': 'Pain relief, fever reduction, anti-inflammatory, cardiovascular protection',
-                    'contraindications': 'Bleeding disorders, severe asthma, children with viral infections',
-                    'side_effects': 'Gastrointestinal bleeding, tinnitus, allergic reactions'
-                },
-                'ibuprofen': {
-                    'generic_name': 'ibuprofen',
-                    'brand_names': ['Advil', 'Motrin', 'Nurofen'],
-                    'smiles': 'CC(C)CC1=CC=C(C=C1)C(C)C(=O)O',
-                    'molecular_formula': 'C13H18O2',
-                    'molecular_weight': 206.29,
-                    'therapeutic_class': 'NSAID',
-                    'mechanism_of_action': 'Reversibly inhibits cyclooxygenase enzymes (COX-1 and COX-2)',
-                    'indications': 'Pain, fever, inflammation',
-                    'contraindications': 'Severe heart failure, active GI bleeding, severe renal impairment',
-                    'side_effects': 'Nausea, dyspepsia, GI bleeding, headache'
-                },
-                'metformin': {
-                    'generic_name': 'metformin hydrochloride',
-                    'brand_names': ['Glucophage', 'Fortamet', 'Glumetza'],
-                    'smiles': 'CN(C)C(=N)N=C(N)N',
-                    'molecular_formula': 'C4H11N5',
-                    'molecular_weight': 129.16,
-                    'therapeutic_class': 'Antidiabetic (Biguanide)',
-                    'mechanism_of_action': 'Decreases hepatic glucose production, increases insulin sensitivity',
-                    'indications': 'Type 2 diabetes mellitus, polycystic ovary syndrome',
-                    'contraindications': 'Severe renal impairment, metabolic acidosis, diabetic ketoacidosis',
-                    'side_effects': 'Nausea, diarrhea, metallic taste, lactic acidosis (rare)'
-                },
-                'atorvastatin': {
-                    'generic_name': 'atorvastatin calcium',
-                    'brand_names': ['Lipitor', 'Torvast', 'Atorlip'],
-                    'smiles': 'CC(C)C1=C(C(=C(N1CC[C@H](C[C@H](CC(=O)O)O)O)C2=CC=C(C=C2)F)C3=CC=CC=C3)C(=O)NC4=CC=CC=C4',
-                    'molecular_formula': 'C33H35FN2O5',
-                    'molecular_weight': 558.64,
-                    'therapeutic_class': 'HMG-CoA Reductase Inhibitor (Statin)',
-                    'mechanism_of_action': 'Inhibits HMG-CoA reductase, reducing cholesterol synthesis',
-                    'indications': 'Hypercholesterolemia, cardiovascular disease prevention',
-                    'contraindications': 'Active liver disease, pregnancy, breastfeeding',
-                    'side_effects': 'Muscle pain, liver enzyme elevation, diabetes risk'
-                },
-                'lisinopril': {
-                    'generic_name': 'lisinopril',
-                    'brand_names': ['Prinivil', 'Zestril', 'Qbrelis'],
-                    'smiles': 'CCCCN1CCCC1C(=O)N[C@@H](CCc2ccccc2)C(=O)N3CCC[C@H]3C(=O)O',
-                    'molecular_formula': 'C21H31N3O5',
-                    'molecular_weight': 405.49,
-                    'therapeutic_class': 'ACE Inhibitor',
-                    'mechanism_of_action': 'Inhibits angiotensin-converting enzyme, reducing vasoconstriction',
-                    'indications': 'Hypertension, heart failure, post-myocardial infarction',
-                    'contraindications': 'Angioedema history, bilateral renal artery stenosis, pregnancy',
-                    'side_effects': 'Dry cough, hyperkalemia, angioedema, hypotension'
-                }
-            }
-            
-            drug_name_lower = drug_name.lower()
-            for drug_key, drug_info in drug_database.items():
-                if drug_key in drug_name_lower or drug_name_lower in drug_info['generic_name'].lower():
-                    return drug_info
-            
-            return None
-            
-        except Exception as e:
-            logging.error(f"Error getting drug info for {drug_name}: {e}")
-            return None
+        drug_key = _match_drug_key(drug_name.lower())
+        return _DRUG_DATABASE[drug_key] if drug_key else None
     
     def scrape_drug_interactions(self, drug1, drug2):
         """Generate drug interaction data based on known pharmaceutical interactions"""
-        try:
-            # Common drug interactions database
-            interactions_db = {
-                ('aspirin', 'warfarin'): {
-                    'interaction_type': 'major',
-                    'description': 'Increased risk of bleeding due to additive anticoagulant effects',
-                    'clinical_significance': 'Monitor INR closely, consider dose adjustment',
-                    'mechanism': 'Aspirin inhibits platelet aggregation while warfarin inhibits coagulation cascade',
-                    'management': 'Monitor for signs of bleeding, frequent INR monitoring',
-                    'severity_level': 4,
-                    'evidence_level': 'established'
-                },
-                ('metformin', 'contrast_media'): {
-                    'interaction_type': 'moderate',
-                    'description': 'Risk of lactic acidosis in patients with renal impairment',
-                    'clinical_significance': 'Discontinue metformin before contrast procedures',
-                    'mechanism': 'Contrast media can cause acute renal failure, leading to metformin accumulation',
-                    'management': 'Hold metformin 48 hours before and after contrast administration',
-                    'severity_level': 3,
-                    'evidence_level': 'established'
-                },
-                ('atorvastatin', 'grapefruit'): {
-                    'interaction_type': 'moderate',
-                    'description': 'Grapefruit juice increases atorvastatin concentration',
-                    'clinical_significance': 'Increased risk of myopathy and rhabdomyolysis',
-                    'mechanism': 'Grapefruit juice inhibits CYP3A4 enzyme',
-                    'management': 'Avoid grapefruit juice or consider alternative statin',
-                    'severity_level': 3,
-                    'evidence_level': 'established'
-                }
-            }
-            
-            # Check for known interactions
-            for (d1, d2), interaction in interactions_db.items():
-                if (d1 in drug1.lower() and d2 in drug2.lower()) or (d1 in drug2.lower() and d2 in drug1.lower()):
-                    return interaction
-            
-            return None
-            
-        except Exception as e:
-            logging.error(f"Error getting drug interactions for {drug1} and {drug2}: {e}")
-            return None
+        # Matching is symmetric, so order the pair to share one cache entry
+        return _match_interaction(*sorted((drug1.lower(), drug2.lower())))
     
     def scrape_medical_literature(self, topic):
         """Scrape medical literature and research data"""
-        try:
-            # Medical knowledge base covering key drug discovery topics
-            medical_knowledge = {
-                'drug_discovery': [
-                    {
-                        'title': 'Modern Drug Discovery Process',
-                        'content': 'Drug discovery is a complex process involving target identification, hit identification, lead optimization, and preclinical development. Modern approaches integrate computational methods, high-throughput screening, and structure-based drug design to accelerate the discovery of new therapeutic agents.',
-                        'keywords': ['drug discovery', 'target identification', 'lead optimization', 'preclinical development'],
-                        'confidence': 0.95
-                    },
-                    {
-                        'title': 'ADMET Properties in Drug Development',
-                        'content': 'ADMET (Absorption, Distribution, Metabolism, Excretion, Toxicity) properties are critical determinants of drug success. Early assessment of ADMET properties can prevent late-stage failures and reduce development costs. In silico ADMET prediction tools have become essential in modern drug discovery.',
-                        'keywords': ['ADMET', 'pharmacokinetics', 'drug metabolism', 'toxicity', 'in silico'],
-                        'confidence': 0.92
-                    }
-                ],
-                'pharmacology': [
-                    {
-                        'title': 'Receptor-Drug Interactions',
-                        'content': 'Drug-receptor interactions form the basis of pharmacological action. Understanding binding kinetics, selectivity, and functional selectivity is crucial for developing effective therapeutics with minimal side effects. Structure-activity relationships guide optimization of drug-receptor interactions.',
-                        'keywords': ['drug-receptor', 'binding kinetics', 'selectivity', 'SAR'],
-                        'confidence': 0.90
-                    },
-                    {
-                        'title': 'Pharmacokinetic Modeling',
-                        'content': 'Pharmacokinetic modeling describes drug absorption, distribution, metabolism, and elimination. Population pharmacokinetic models help predict drug behavior in different patient populations and guide dosing strategies. PBPK modeling integrates physiological parameters for more accurate predictions.',
-                        'keywords': ['pharmacokinetics', 'population PK', 'PBPK modeling', 'dosing'],
-                        'confidence': 0.88
-                    }
-                ],
-                'toxicology': [
-                    {
-                        'title': 'Predictive Toxicology Methods',
-                        'content': 'Predictive toxicology uses computational and in vitro methods to assess potential adverse effects early in drug development. QSAR models, read-across approaches, and organ-on-chip technologies provide alternatives to animal testing while improving prediction accuracy.',
-                        'keywords': ['predictive toxicology', 'QSAR', 'read-across', 'organ-on-chip'],
-                        'confidence': 0.87
-                    },
-                    {
-                        'title': 'Hepatotoxicity Assessment',
-                        'content': 'Drug-induced liver injury (DILI) is a major cause of drug withdrawal from the market. Early identification of hepatotoxic potential through biomarkers, in vitro models, and computational predictions is essential for drug safety assessment.',
-                        'keywords': ['hepatotoxicity', 'DILI', 'biomarkers', 'drug safety'],
-                        'confidence': 0.85
-                    }
-                ]
+        return _MEDICAL_KNOWLEDGE.get(topic, [])
+    
+    def _fetch_drug_info(self, drug_name):
+        """Return drug information from the local drug database, falling back to PubChem"""
+        return self.scrape_drugbank_info(drug_name) or self.scrape_pubchem_data(drug_name)
+    
+    def _look_up_missing_drugs(self, executor):
+        """Start fetching information for common drugs not yet in the database; return (name, future) pairs"""
+        # Check which drugs already exist, in one query
+        existing = {
+            name for (name,) in db.session.query(DrugData.name).filter(DrugData.name.in_(_COMMON_DRUGS))
+        }
+        
+        # Get drug information concurrently, since PubChem lookups are network-bound;
+        # the session is only used on this thread
+        return [
+            (drug_name, executor.submit(self._fetch_drug_info, drug_name))
+            for drug_name in _COMMON_DRUGS if drug_name not in existing
+        ]
+    
+    def _insert_drugs(self, lookups):
+        """Insert the drugs whose lookups found information; return how many were inserted"""
+        drug_infos = ((drug_name, future.result()) for drug_name, future in lookups)
+        new_drugs = [
+            {
+                'name': drug_name,
+                'generic_name': drug_info.get('generic_name', ''),
+                'brand_names': dumps(drug_info.get('brand_names', [])),
+                'smiles': drug_info.get('smiles', ''),
+                'inchi': drug_info.get('inchi', ''),
+                'molecular_formula': drug_info.get('molecular_formula', ''),
+                'molecular_weight': drug_info.get('molecular_weight', 0),
+                'therapeutic_class': drug_info.get('therapeutic_class', ''),
+                'mechanism_of_action': drug_info.get('mechanism_of_action', ''),
+                'indications': drug_info.get('indications', ''),
+                'contraindications': drug_info.get('contraindications', ''),
+                'side_effects': drug_info.get('side_effects', ''),
+                'dosage_forms': dumps(['tablet', 'capsule'])
             }
-            
-            if topic in medical_knowledge:
-                return medical_knowledge[topic]
-            
-            return []
-            
-        except Exception as e:
-            logging.error(f"Error scraping medical literature for {topic}: {e}")
-            return []
+            for drug_name, drug_info in drug_infos if drug_info
+        ]
+        
+        # Insert all new drugs in one executemany rather than one ORM add per row; a Core
+        # insert on the table returns a cursor result, which reports the inserted rowcount
+        inserted = db.session.execute(insert(DrugData.__table__), new_drugs).rowcount if new_drugs else 0
+        logging.info("Updated drug database with %d new drugs", inserted)
+        return inserted
     
     def update_drug_database(self):
-        """Update the drug database with scraped data"""
-        try:
-            common_drugs = [
-                'aspirin', 'ibuprofen', 'acetaminophen', 'metformin', 'atorvastatin',
-                'lisinopril', 'amlodipine', 'omeprazole', 'levothyroxine', 'albuterol',
-                'hydrochlorothiazide', 'losartan', 'gabapentin', 'furosemide', 'prednisone'
-            ]
-            
-            for drug_name in common_drugs:
-                # Check if drug already exists
-                existing_drug = DrugData.query.filter_by(name=drug_name).first()
-                if existing_drug:
-                    continue
-                
-                # Get drug information
-                drug_info = self.scrape_drugbank_info(drug_name)
-                if drug_info:
-                    new_drug = DrugData(
-                        name=drug_name,
-                        generic_name=drug_info.get('generic_name', ''),
-                        brand_names=json.dumps(drug_info.get('brand_names', [])),
-                        smiles=drug_info.get('smiles', ''),
-                        molecular_formula=drug_info.get('molecular_formula', ''),
-                        molecular_weight=drug_info.get('molecular_weight', 0),
-                        therapeutic_class=drug_info.get('therapeutic_class', ''),
-                        mechanism_of_action=drug_info.get('mechanism_of_action', ''),
-                        indications=drug_info.get('indications', ''),
-                        contraindications=drug_info.get('contraindications', ''),
-                        side_effects=drug_info.get('side_effects', ''),
-                        dosage_forms=json.dumps(['tablet', 'capsule'])
-                    )
-                    
-                    db.session.add(new_drug)
-                
-                # Add small delay to be respectful
-                time.sleep(0.5)
-            
-            db.session.commit()
-            logging.info(f"Updated drug database with {len(common_drugs)} drugs")
-            
-        except Exception as e:
-            logging.error(f"Error updating drug database: {e}")
-            db.session.rollback()
+        """Update the drug database with scraped data; the caller commits"""
+        with ThreadPoolExecutor(max_workers=PUBCHEM_CONCURRENCY) as executor:
+            lookups = self._look_up_missing_drugs(executor)
+        self._insert_drugs(lookups)
     
     def update_knowledge_base(self):
-        """Update knowledge base with scraped medical literature"""
-        try:
-            topics = ['drug_discovery', 'pharmacology', 'toxicology']
+        """Update knowledge base with scraped medical literature; the caller commits"""
+        topics = ['drug_discovery', 'pharmacology', 'toxicology']
+        
+        # Entries are matched on their first 100 chars; fetch those for every topic in one query
+        existing_entries = set(
+            db.session.query(KnowledgeBase.topic, func.substr(KnowledgeBase.content, 1, 100))
+            .filter(KnowledgeBase.topic.in_(topics))
+        )
+        
+        new_entries = []
+        for topic in topics:
+            literature_data = self.scrape_medical_literature(topic)
             
-            for topic in topics:
-                literature_data = self.scrape_medical_literature(topic)
+            for entry in literature_data:
+                # Check if entry already exists
+                key = (topic, entry['content'][:100])
                 
-                for entry in literature_data:
-                    # Check if entry already exists
-                    existing_entry = KnowledgeBase.query.filter_by(
-                        topic=topic,
-                        content=entry['content'][:100]  # Check first 100 chars
-                    ).first()
-                    
-                    if not existing_entry:
-                        kb_entry = KnowledgeBase(
-                            topic=topic,
-                            content=entry['content'],
-                            keywords=json.dumps(entry['keywords']),
-                            confidence_score=entry['confidence'],
-                            category=topic,
-                            is_verified=True,
-                            source_url='medical_literature_database'
-                        )
-                        
-                        db.session.add(kb_entry)
-            
-            db.session.commit()
-            logging.info("Successfully updated knowledge base with medical literature")
-            
-        except Exception as e:
-            logging.error(f"Error updating knowledge base: {e}")
-            db.session.rollback()
+                if key not in existing_entries:
+                    existing_entries.add(key)
+                    new_entries.append({
+                        'topic': topic,
+                        'content': entry['content'],
+                        'keywords': dumps(entry['keywords']),
+                        'confidence_score': entry['confidence'],
+                        'category': topic,
+                        'is_verified': True,
+                        'source_url': 'medical_literature_database'
+                    })
+        
+        if new_entries:
+            db.session.execute(insert(KnowledgeBase), new_entries)
+        logging.info("Successfully updated knowledge base with medical literature")
     
     def scrape_all_data(self):
-        """Scrape all available data sources"""
+        """Scrape all available data sources; return False if nothing could be fetched"""
         logging.info("Starting comprehensive data scraping...")
         
+        # All three updates commit together, so a failure leaves none of them half applied
         try:
-            # Update drug database
-            self.update_drug_database()
+            with ThreadPoolExecutor(max_workers=PUBCHEM_CONCURRENCY) as executor:
+                lookups = self._look_up_missing_drugs(executor)
+                
+                # Update knowledge base while the drug lookups are in flight; it doesn't depend on them
+                self.update_knowledge_base()
             
-            # Update knowledge base
-            self.update_knowledge_base()
+            # Update drug database
+            inserted = self._insert_drugs(lookups)
             
-            # Add drug interactions
+            # Add drug interactions, which need the new drugs' ids
             self.add_drug_interactions()
             
+            db.session.commit()
+            
+            # Keep what was gathered, but don't report success when every lookup failed,
+            # so the next run retries them instead of trusting the manifest
+            if lookups and not inserted:
+                logging.warning("Data scraping finished, but all %d drug lookups failed", len(lookups))
+                return False
+            
             logging.info("Data scraping completed successfully")
             return True
             
-        except Exception as e:
-            logging.error(f"Error in comprehensive data scraping: {e}")
+        except Exception:
+            logging.exception("Error in comprehensive data scraping")
+            db.session.rollback()
             return False
     
     def add_drug_interactions(self):
-        """Add drug interaction data to database"""
-        try:
-            # Get some drugs from database
-            drugs = DrugData.query.limit(10).all()
-            
-            interaction_pairs = [
-                ('aspirin', 'warfarin'),
-                ('metformin', 'contrast_media'),
-                ('atorvastatin', 'grapefruit'),
-                ('lisinopril', 'potassium_supplements'),
-                ('ibuprofen', 'aspirin')
-            ]
+        """Add drug interaction data to database; the caller commits"""
+        interaction_pairs = [
+            ('aspirin', 'warfarin'),
+            ('metformin', 'contrast_media'),
+            ('atorvastatin', 'grapefruit'),
+            ('lisinopril', 'potassium_supplements'),
+            ('ibuprofen', 'aspirin')
+        ]
+        
+        # Fetch every drug named in the pairs in one query
+        names = {name for pair in interaction_pairs for name in pair}
+        drug_by_name = {drug.name: drug for drug in DrugData.query.filter(DrugData.name.in_(names))}
+        
+        # Fetch the interactions already recorded for those drugs in one more query
+        drug_ids = [drug.id for drug in drug_by_name.values()]
+        existing_pairs = set(
+            db.session.query(DrugInteraction.drug1_id, DrugInteraction.drug2_id)
+            .filter(DrugInteraction.drug1_id.in_(drug_ids))
+        )
+        
+        new_interactions = []
+        for drug1_name, drug2_name in interaction_pairs:
+            drug1 = drug_by_name.get(drug1_name)
+            drug2 = drug_by_name.get(drug2_name)
             
-            for drug1_name, drug2_name in interaction_pairs:
-                drug1 = DrugData.query.filter_by(name=drug1_name).first()
-                drug2 = DrugData.query.filter_by(name=drug2_name).first()
+            if drug1:  # drug2 might not exist for some interactions like grapefruit
+                interaction_data = self.scrape_drug_interactions(drug1_name, drug2_name)
+                pair = (drug1.id, drug2.id if drug2 else None)
                 
-                if drug1:  # drug2 might not exist for some interactions like grapefruit
-                    interaction_data = self.scrape_drug_interactions(drug1_name, drug2_name)
-                    
-                    if interaction_data:
-                        # Check if interaction already exists
-                        existing = DrugInteraction.query.filter_by(
-                            drug1_id=drug1.id,
-                            drug2_id=drug2.id if drug2 else None
-                        ).first()
-                        
-                        if not existing:
-                            new_interaction = DrugInteraction(
-                                drug1_id=drug1.id,
-                                drug2_id=drug2.id if drug2 else None,
-                                interaction_type=interaction_data['interaction_type'],
-                                description=interaction_data['description'],
-                                clinical_significance=interaction_data['clinical_significance'],
-                                mechanism=interaction_data['mechanism'],
-                                management=interaction_data['management'],
-                                severity_level=interaction_data['severity_level'],
-                                evidence_level=interaction_data['evidence_level']
-                            )
-                            
-                            db.session.add(new_interaction)
-            
-            db.session.commit()
-            logging.info("Successfully added drug interactions")
-            
-        except Exception as e:
-            logging.error(f"Error adding drug interactions: {e}")
-            db.session.rollback()
+                # Skip interactions that already exist
+                if interaction_data and pair not in existing_pairs:
+                    existing_pairs.add(pair)
+                    new_interactions.append({
+                        'drug1_id': pair[0],
+                        'drug2_id': pair[1],
+                        'interaction_type': interaction_data['interaction_type'],
+                        'description': interaction_data['description'],
+                        'clinical_significance': interaction_data['clinical_significance'],
+                        'mechanism': interaction_data['mechanism'],
+                        'management': interaction_data['management'],
+                        'severity_level': interaction_data['severity_level'],
+                        'evidence_level': interaction_data['evidence_level']
+                    })
+        
+        if new_interactions:
+            db.session.execute(insert(DrugInteraction), new_interactions)
+        logging.info("Successfully added drug interactions")
 
 def initialize_comprehensive_database():
     """Initialize comprehensive drug discovery database"""
     try:
+        # Skip the scrape when the manifest shows a recent successful run
+        manifest_path = os.path.join(_cache_dir(), 'manifest.json')
+        manifest = _read_json(manifest_path) or {}
+        if time.time() - manifest.get('scrape_all_data', 0) < SCRAPE_INTERVAL:
+            logging.info("Comprehensive database is up to date, skipping scrape")
+            return True
+        
         scraper = DrugDiscoveryDataScraper()
         success = scraper.scrape_all_data()
         
         if success:
+            manifest['scrape_all_data'] = time.time()
+            _write_json_atomic(manifest_path, manifest)
             logging.info("Comprehensive database initialization completed")
         else:
             logging.error("Database initialization encountered errors")
         
         return success
         
-    except Exception as e:
-        logging.error(f"Error initializing comprehensive database: {e}")
+    except Exception:
+        logging.exception("Error initializing comprehensive database")
         return False
 
 def update_database_from_sources():
@@ -415,6 +625,6 @@ def update_database_from_sources():
         scraper = DrugDiscoveryDataScraper()
         return scraper.scrape_all_data()
         
-    except Exception as e:
-        logging.error(f"Error updating database from sources: {e}")
+    except Exception:
+        logging.exception("Error updating database from sources")
         return False
\ No newline at end of file
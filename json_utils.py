@@ -0,0 +1,25 @@
+"""
+JSON Helpers for MutaSight AI Platform
+Serialises with orjson when it is installed, falling back to the standard library
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(value):
+    """Serialise a value to a JSON string"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
+def loads(data):
+    """Parse a JSON string or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,61 @@
+"""
+Keyword Matching for MutaSight AI Platform
+Routes queries to categories by matching a whole keyword table in one pass
+"""
+
+import re
+
+
+class KeywordMatcher:
+    """Single-pass multi-keyword matcher over a category -> keywords table"""
+
+    def __init__(self, table):
+        # Categories keep the table's order, which is also their routing priority
+        self.categories = tuple(table)
+        self._categories_of = {}
+        for category, keywords in table.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                self._categories_of[keyword] = self._categories_of.get(keyword, ()) + (category,)
+
+        keywords = sorted(self._categories_of, key=len, reverse=True)
+
+        # The longest keyword matched at a position implies every keyword that is a prefix of it
+        self._prefixes = {
+            keyword: tuple(other for other in keywords if other != keyword and keyword.startswith(other))
+            for keyword in keywords
+        }
+
+        # A zero-width lookahead reports a match at every position, so overlapping keywords are found
+        alternation = '|'.join(re.escape(keyword) for keyword in keywords)
+        self._pattern = re.compile(f'(?=({alternation}))') if keywords else None
+
+    def matches(self, text):
+        """Return the set of keywords occurring in text (text must be lowercased)"""
+        found = set()
+        if self._pattern is None:
+            return found
+
+        for match in self._pattern.finditer(text):
+            keyword = match.group(1)
+            found.add(keyword)
+            found.update(self._prefixes[keyword])
+
+        return found
+
+    def categories_in(self, text):
+        """Return the set of categories with at least one keyword in text"""
+        return {category for keyword in self.matches(text) for category in self._categories_of[keyword]}
+
+    def hit_counts(self, text):
+        """Return the number of distinct keywords matched in text per category"""
+        counts = {}
+        for keyword in self.matches(text):
+            for category in self._categories_of[keyword]:
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def route(self, text, default='general'):
+        """Return the highest-priority category matched in text, or default"""
+        hits = self.categories_in(text)
+        return next((category for category in self.categories if category in hits), default)
@@ -1,27 +1,46 @@
 import json
 import uuid
+from collections import defaultdict
 from datetime import datetime, timedelta
-from flask import request, session
+from flask import current_app, request, session
 from flask_socketio import emit, join_room, leave_room
+from sqlalchemy import bindparam, func, update
 from app import db
+from batch_writer import BatchWriter
 from models import UserSession, User, Project, ProjectMember
 import logging
 
+# Activity updates are written to the database in batches at least this often (seconds)
+ACTIVITY_FLUSH_INTERVAL = 0.5
+
+# Cursor positions are broadcast at most this often per session (seconds); moves in between are dropped
+CURSOR_EMIT_INTERVAL = 0.05
+
 class LiveUserTracker:
     """Track live users on projects for real-time collaboration"""
     
     def __init__(self, socketio):
         self.socketio = socketio
         self.active_sessions = {}  # session_id: user_data
-        self.project_rooms = {}    # project_id: [session_ids]
+        self.project_rooms = defaultdict(set)    # project_id: {session_ids}
+        
+        # Socket events only touch memory; session activity reaches the database in batches
+        self._activity_writer = BatchWriter(
+            current_app._get_current_object(), self._write_activity,
+            batch_size=500, flush_interval=ACTIVITY_FLUSH_INTERVAL, name='session-activity-writer'
+        )
+        
+        # Latest unsent cursor update per session, broadcast by a background task
+        self._cursor_pending = {}  # session_id: (project_id, sender sid, payload)
+        self.socketio.start_background_task(self._emit_cursor_updates)
         
-    def start_user_session(self, user_id, project_id=None):
-        """Start tracking a user session"""
+    def start_user_session(self, user_id, project_id=None, sid=None):
+        """Start tracking a user session; sid is the Socket.IO client that started it, if any"""
         try:
             session_id = str(uuid.uuid4())
             
             # Get user info
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 return None
             
@@ -51,12 +70,10 @@ class LiveUserTracker:
             
             # Add to project room if applicable
             if project_id:
-                if project_id not in self.project_rooms:
-                    self.project_rooms[project_id] = []
-                self.project_rooms[project_id].append(session_id)
+                self.project_rooms[project_id].add(session_id)
                 
                 # Notify other users in the project
-                self.broadcast_user_joined(project_id, user.username, session_id)
+                self.broadcast_user_joined(project_id, user.username, session_id, skip_sid=sid)
             
             logging.info(f"Started session for user {user.username} (ID: {user_id})")
             return session_id
@@ -66,8 +83,8 @@ class LiveUserTracker:
             db.session.rollback()
             return None
     
-    def end_user_session(self, session_id):
-        """End a user session"""
+    def end_user_session(self, session_id, sid=None):
+        """End a user session; sid is the Socket.IO client that ended it, None when it went stale"""
         try:
             if session_id not in self.active_sessions:
                 return False
@@ -76,22 +93,20 @@ class LiveUserTracker:
             project_id = session_data.get('project_id')
             username = session_data.get('username')
             
-            # Update database
-            user_session = UserSession.query.filter_by(session_id=session_id).first()
-            if user_session:
-                user_session.is_active = False
-                db.session.commit()
+            # Update database in one UPDATE, without loading the row first
+            UserSession.query.filter_by(session_id=session_id).update({'is_active': False})
+            db.session.commit()
             
             # Remove from memory
             del self.active_sessions[session_id]
+            self._cursor_pending.pop(session_id, None)
             
             # Remove from project room
             if project_id and project_id in self.project_rooms:
-                if session_id in self.project_rooms[project_id]:
-                    self.project_rooms[project_id].remove(session_id)
+                self.project_rooms[project_id].discard(session_id)
                 
                 # Notify other users
-                self.broadcast_user_left(project_id, username, session_id)
+                self.broadcast_user_left(project_id, username, session_id, skip_sid=sid)
             
             logging.info(f"Ended session {session_id} for user {username}")
             return True
@@ -100,14 +115,15 @@ class LiveUserTracker:
             logging.error(f"Error ending user session: {e}")
             return False
     
-    def update_user_activity(self, session_id, page_url=None, activity_data=None):
+    def update_user_activity(self, session_id, page_url=None, activity_data=None, sid=None):
         """Update user activity information"""
         try:
             if session_id not in self.active_sessions:
                 return False
             
             # Update memory
-            self.active_sessions[session_id]['last_activity'] = datetime.utcnow()
+            now = datetime.utcnow()
+            self.active_sessions[session_id]['last_activity'] = now
             
             if page_url:
                 self.active_sessions[session_id]['current_page'] = page_url
@@ -116,19 +132,14 @@ class LiveUserTracker:
                 self.active_sessions[session_id].update(activity_data)
             
             # Update database
-            user_session = UserSession.query.filter_by(session_id=session_id).first()
-            if user_session:
-                user_session.last_activity = datetime.utcnow()
-                if page_url:
-                    user_session.current_page = page_url
-                db.session.commit()
+            self._queue_activity(session_id, now, page_url)
             
             # Broadcast activity to project members
             session_data = self.active_sessions[session_id]
             project_id = session_data.get('project_id')
             
             if project_id:
-                self.broadcast_user_activity(project_id, session_id, activity_data)
+                self.broadcast_user_activity(project_id, session_id, activity_data, skip_sid=sid)
             
             return True
             
@@ -136,13 +147,49 @@ class LiveUserTracker:
             logging.error(f"Error updating user activity: {e}")
             return False
     
+    def _queue_activity(self, session_id, last_activity, page_url=None):
+        """Queue a session's latest activity for the next batched database write"""
+        if not self._activity_writer.put((session_id, last_activity, page_url)):
+            logging.warning("Session activity queue is full, dropping activity update")
+    
+    def _write_activity(self, batch):
+        """Write a batch of session activity as one bulk UPDATE, keeping the latest entry per session"""
+        latest = {}
+        for session_id, last_activity, page_url in batch:
+            # A page change survives later updates in the batch that don't carry one
+            previous_page = latest[session_id]['page_url'] if session_id in latest else None
+            latest[session_id] = {
+                'target_session_id': session_id,
+                'activity_at': last_activity,
+                'page_url': page_url or previous_page
+            }
+        
+        try:
+            # Against the table rather than the model, so this is a plain executemany; a missing
+            # page keeps the stored one
+            user_session = UserSession.__table__
+            db.session.execute(
+                update(user_session)
+                .where(user_session.c.session_id == bindparam('target_session_id'))
+                .values(
+                    last_activity=bindparam('activity_at'),
+                    current_page=func.coalesce(bindparam('page_url'), user_session.c.current_page)
+                ),
+                list(latest.values())
+            )
+            db.session.commit()
+        except Exception as e:
+            logging.error(f"Error writing session activity: {e}")
+            db.session.rollback()
+    
     def get_project_active_users(self, project_id):
         """Get list of active users in a project"""
         try:
             active_users = []
             
             if project_id in self.project_rooms:
-                for session_id in self.project_rooms[project_id]:
+                # Copied, since ending an inactive session removes it from the room
+                for session_id in list(self.project_rooms[project_id]):
                     if session_id in self.active_sessions:
                         session_data = self.active_sessions[session_id]
                         
@@ -167,14 +214,16 @@ class LiveUserTracker:
             logging.error(f"Error getting project active users: {e}")
             return []
     
-    def set_user_typing_status(self, session_id, is_typing, typing_location=None):
+    def set_user_typing_status(self, session_id, is_typing, typing_location=None, sid=None):
         """Set user typing status"""
         try:
             if session_id not in self.active_sessions:
                 return False
             
+            now = datetime.utcnow()
             self.active_sessions[session_id]['is_typing'] = is_typing
-            self.active_sessions[session_id]['last_activity'] = datetime.utcnow()
+            self.active_sessions[session_id]['last_activity'] = now
+            self._queue_activity(session_id, now)
             
             if typing_location:
                 self.active_sessions[session_id]['typing_location'] = typing_location
@@ -184,7 +233,7 @@ class LiveUserTracker:
             project_id = session_data.get('project_id')
             
             if project_id:
-                self.broadcast_typing_status(project_id, session_id, is_typing, typing_location)
+                self.broadcast_typing_status(project_id, session_id, is_typing, typing_location, skip_sid=sid)
             
             return True
             
@@ -192,7 +241,7 @@ class LiveUserTracker:
             logging.error(f"Error setting typing status: {e}")
             return False
     
-    def update_cursor_position(self, session_id, x, y, element_id=None):
+    def update_cursor_position(self, session_id, x, y, element_id=None, sid=None):
         """Update user cursor position for collaborative editing"""
         try:
             if session_id not in self.active_sessions:
@@ -210,11 +259,12 @@ class LiveUserTracker:
             project_id = session_data.get('project_id')
             
             if project_id:
-                self.socketio.emit('cursor_update', {
+                # Replaces any update for this session that hasn't been sent yet
+                self._cursor_pending[session_id] = (project_id, sid, {
                     'session_id': session_id,
                     'username': session_data['username'],
                     'cursor_position': self.active_sessions[session_id]['cursor_position']
-                }, room=f'project_{project_id}')
+                })
             
             return True
             
@@ -222,34 +272,52 @@ class LiveUserTracker:
             logging.error(f"Error updating cursor position: {e}")
             return False
     
-    def broadcast_user_joined(self, project_id, username, session_id):
-        """Broadcast that a user joined the project"""
+    def _emit_cursor_updates(self):
+        """Background loop broadcasting the latest pending cursor update of each session"""
+        while True:
+            self.socketio.sleep(CURSOR_EMIT_INTERVAL)
+            
+            # popitem is atomic, so updates arriving meanwhile are either sent now or next time
+            while self._cursor_pending:
+                try:
+                    project_id, sid, payload = self._cursor_pending.popitem()[1]
+                    self.socketio.emit('cursor_update', payload, room=f'project_{project_id}', skip_sid=sid)
+                except KeyError:
+                    break
+                except Exception as e:
+                    logging.error(f"Error broadcasting cursor update: {e}")
+    
+    def broadcast_user_joined(self, project_id, username, session_id, skip_sid=None):
+        """Broadcast that a user joined the project, except to the client skip_sid"""
         try:
             self.socketio.emit('user_joined', {
                 'username': username,
                 'session_id': session_id,
                 'timestamp': datetime.utcnow().isoformat(),
                 'active_users': self.get_project_active_users(project_id)
-            }, room=f'project_{project_id}')
+            }, room=f'project_{project_id}', skip_sid=skip_sid)
             
         except Exception as e:
             logging.error(f"Error broadcasting user joined: {e}")
     
-    def broadcast_user_left(self, project_id, username, session_id):
-        """Broadcast that a user left the project"""
+    def broadcast_user_left(self, project_id, username, session_id, active_users=None, skip_sid=None):
+        """Broadcast that a user left the project, except to the client skip_sid"""
         try:
+            if active_users is None:
+                active_users = self.get_project_active_users(project_id)
+            
             self.socketio.emit('user_left', {
                 'username': username,
                 'session_id': session_id,
                 'timestamp': datetime.utcnow().isoformat(),
-                'active_users': self.get_project_active_users(project_id)
-            }, room=f'project_{project_id}')
+                'active_users': active_users
+            }, room=f'project_{project_id}', skip_sid=skip_sid)
             
         except Exception as e:
             logging.error(f"Error broadcasting user left: {e}")
     
-    def broadcast_user_activity(self, project_id, session_id, activity_data):
-        """Broadcast user activity to project members"""
+    def broadcast_user_activity(self, project_id, session_id, activity_data, skip_sid=None):
+        """Broadcast user activity to project members, except the client skip_sid"""
         try:
             if session_id in self.active_sessions:
                 session_data = self.active_sessions[session_id]
@@ -259,13 +327,13 @@ class LiveUserTracker:
                     'username': session_data['username'],
                     'activity': activity_data,
                     'timestamp': datetime.utcnow().isoformat()
-                }, room=f'project_{project_id}')
+                }, room=f'project_{project_id}', skip_sid=skip_sid)
             
         except Exception as e:
             logging.error(f"Error broadcasting user activity: {e}")
     
-    def broadcast_typing_status(self, project_id, session_id, is_typing, location=None):
-        """Broadcast typing status to project members"""
+    def broadcast_typing_status(self, project_id, session_id, is_typing, location=None, skip_sid=None):
+        """Broadcast typing status to project members, except the client skip_sid"""
         try:
             if session_id in self.active_sessions:
                 session_data = self.active_sessions[session_id]
@@ -276,7 +344,7 @@ class LiveUserTracker:
                     'is_typing': is_typing,
                     'location': location,
                     'timestamp': datetime.utcnow().isoformat()
-                }, room=f'project_{project_id}')
+                }, room=f'project_{project_id}', skip_sid=skip_sid)
             
         except Exception as e:
             logging.error(f"Error broadcasting typing status: {e}")
@@ -285,28 +353,52 @@ class LiveUserTracker:
         """Clean up inactive user sessions"""
         try:
             cutoff_time = datetime.utcnow() - timedelta(minutes=10)
-            inactive_sessions = []
             
-            for session_id, session_data in self.active_sessions.items():
-                if session_data['last_activity'] < cutoff_time:
-                    inactive_sessions.append(session_id)
+            # Write queued activity first, so recently active sessions aren't ended
+            self._activity_writer.flush()
             
-            for session_id in inactive_sessions:
-                self.end_user_session(session_id)
+            # Deactivate every stale session in one statement, which reports the sessions it ended
+            user_session = UserSession.__table__
+            result = db.session.execute(
+                update(user_session)
+                .where(user_session.c.last_activity < cutoff_time, user_session.c.is_active == True)
+                .values(is_active=False)
+                .returning(user_session.c.session_id)
+            )
+            inactive_sessions = set(result.scalars())
+            db.session.commit()
             
-            # Also clean up database
-            UserSession.query.filter(
-                UserSession.last_activity < cutoff_time,
-                UserSession.is_active == True
-            ).update({'is_active': False})
+            # Also catch sessions that are stale in memory but have no active row
+            inactive_sessions.update(
+                session_id for session_id, session_data in self.active_sessions.items()
+                if session_data['last_activity'] < cutoff_time
+            )
             
-            db.session.commit()
+            # Remove ended sessions tracked here (others belong to other processes) from memory
+            left_by_project = defaultdict(list)
+            for session_id in inactive_sessions:
+                session_data = self.active_sessions.pop(session_id, None)
+                if session_data is None:
+                    continue
+                
+                self._cursor_pending.pop(session_id, None)
+                project_id = session_data.get('project_id')
+                if project_id:
+                    self.project_rooms[project_id].discard(session_id)
+                    left_by_project[project_id].append((session_data.get('username'), session_id))
+            
+            # Notify other users, listing each project's remaining users once
+            for project_id, left in left_by_project.items():
+                active_users = self.get_project_active_users(project_id)
+                for username, session_id in left:
+                    self.broadcast_user_left(project_id, username, session_id, active_users)
             
             if inactive_sessions:
                 logging.info(f"Cleaned up {len(inactive_sessions)} inactive sessions")
             
         except Exception as e:
             logging.error(f"Error cleaning up inactive sessions: {e}")
+            db.session.rollback()
     
     def get_session_statistics(self):
         """Get session statistics"""
@@ -318,7 +410,7 @@ class LiveUserTracker:
             }
             
             for project_id, sessions in self.project_rooms.items():
-                active_count = sum(1 for s in sessions if s in self.active_sessions)
+                active_count = len(sessions & self.active_sessions.keys())
                 stats['sessions_by_project'][project_id] = active_count
             
             return stats
@@ -346,7 +438,7 @@ def setup_live_tracking_events(socketio, live_tracker):
                 ).first()
                 
                 if member:
-                    session_id = live_tracker.start_user_session(user_id, project_id)
+                    session_id = live_tracker.start_user_session(user_id, project_id, sid=request.sid)
                     if session_id:
                         join_room(f'project_{project_id}')
                         emit('joined_project', {
@@ -369,7 +461,7 @@ def setup_live_tracking_events(socketio, live_tracker):
             project_id = data.get('project_id')
             
             if session_id and project_id:
-                live_tracker.end_user_session(session_id)
+                live_tracker.end_user_session(session_id, sid=request.sid)
                 leave_room(f'project_{project_id}')
                 emit('left_project', {'project_id': project_id})
             
@@ -385,7 +477,7 @@ def setup_live_tracking_events(socketio, live_tracker):
             activity_data = data.get('activity_data', {})
             
             if session_id:
-                live_tracker.update_user_activity(session_id, page_url, activity_data)
+                live_tracker.update_user_activity(session_id, page_url, activity_data, sid=request.sid)
             
         except Exception as e:
             logging.error(f"Error handling activity update: {e}")
@@ -398,7 +490,7 @@ def setup_live_tracking_events(socketio, live_tracker):
             location = data.get('location')
             
             if session_id:
-                live_tracker.set_user_typing_status(session_id, True, location)
+                live_tracker.set_user_typing_status(session_id, True, location, sid=request.sid)
             
         except Exception as e:
             logging.error(f"Error handling typing start: {e}")
@@ -410,7 +502,7 @@ def setup_live_tracking_events(socketio, live_tracker):
             session_id = data.get('session_id')
             
             if session_id:
-                live_tracker.set_user_typing_status(session_id, False)
+                live_tracker.set_user_typing_status(session_id, False, sid=request.sid)
             
         except Exception as e:
             logging.error(f"Error handling typing stop: {e}")
@@ -425,7 +517,7 @@ def setup_live_tracking_events(socketio, live_tracker):
             element_id = data.get('element_id')
             
             if session_id and x is not None and y is not None:
-                live_tracker.update_cursor_position(session_id, x, y, element_id)
+                live_tracker.update_cursor_position(session_id, x, y, element_id, sid=request.sid)
             
         except Exception as e:
             logging.error(f"Error handling cursor move: {e}")
@@ -61,7 +61,7 @@ class MolecularAnalysis(db.Model):
 
 class DrugData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(200), nullable=False, unique=True, index=True)
     generic_name = db.Column(db.String(200))
     brand_names = db.Column(db.Text)  # JSON array
     smiles = db.Column(db.String(500))
@@ -77,16 +77,16 @@ class DrugData(db.Model):
 
 class Excipient(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(200), nullable=False, unique=True, index=True)
     chemical_name = db.Column(db.String(300))
     cas_number = db.Column(db.String(20))
     function = db.Column(db.String(100))  # binder, disintegrant, etc.
     description = db.Column(db.Text)
-    compatibility = db.Column(db.Text)  # JSON object
+    compatibility = db.Column(db.JSON)
     toxicity_data = db.Column(db.Text)
     regulatory_status = db.Column(db.String(100))
     typical_concentration = db.Column(db.String(100))
-    physical_properties = db.Column(db.Text)  # JSON object
+    physical_properties = db.Column(db.JSON)
 
 class Report(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -104,7 +104,7 @@ class AIModel(db.Model):
     name = db.Column(db.String(200), nullable=False)
     model_type = db.Column(db.String(50), nullable=False)  # drug_discovery, molecular_analysis, toxicity_prediction
     description = db.Column(db.Text)
-    model_data = db.Column(db.Text)  # Pickled model data
+    model_data = db.Column(db.LargeBinary)  # joblib-serialised model data
     training_data_source = db.Column(db.String(500))
     accuracy_score = db.Column(db.Float)
     last_trained = db.Column(db.DateTime, default=datetime.utcnow)
@@ -116,7 +116,7 @@ class AIModel(db.Model):
 class KnowledgeBase(db.Model):
     """Knowledge base for AI training and responses"""
     id = db.Column(db.Integer, primary_key=True)
-    topic = db.Column(db.String(200), nullable=False)  # drug_discovery, pharmacology, toxicology
+    topic = db.Column(db.String(200), nullable=False, index=True)  # drug_discovery, pharmacology, toxicology
     content = db.Column(db.Text, nullable=False)
     source_url = db.Column(db.String(500))
     confidence_score = db.Column(db.Float, default=1.0)
@@ -125,6 +125,18 @@ class KnowledgeBase(db.Model):
     category = db.Column(db.String(100))
     is_verified = db.Column(db.Boolean, default=False)
 
+class Keyword(db.Model):
+    """Normalised keyword shared by knowledge base entries"""
+    id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(200), unique=True, nullable=False)
+
+# Links knowledge base entries to their keywords
+kb_keywords = db.Table(
+    'kb_keywords',
+    db.Column('knowledge_base_id', db.Integer, db.ForeignKey('knowledge_base.id'), primary_key=True),
+    db.Column('keyword_id', db.Integer, db.ForeignKey('keyword.id'), primary_key=True, index=True)
+)
+
 class UserSession(db.Model):
     """Track live users on projects"""
     id = db.Column(db.Integer, primary_key=True)
@@ -136,6 +148,12 @@ class UserSession(db.Model):
     current_page = db.Column(db.String(200))
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.String(500))
+    
+    __table_args__ = (
+        # Inactive-session cleanup filters on is_active, then ranges over last_activity
+        db.Index('ix_user_session_is_active_last_activity', 'is_active', 'last_activity'),
+        db.Index('ix_user_session_project_id_is_active', 'project_id', 'is_active'),
+    )
 
 class ChatbotTraining(db.Model):
     """Training data and interactions for chatbot improvement"""
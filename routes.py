@@ -12,7 +12,6 @@ from molecular_utils import analyze_molecule, generate_2d_structure
 from chatbot import DrugDiscoveryBot
 from report_generator import generate_pdf_report
 from live_tracking import create_live_tracker
-from ai_engine import get_ai_prediction, get_chatbot_response, ai_engine
 
 main_bp = Blueprint('main', __name__)
 bot = DrugDiscoveryBot()
@@ -186,7 +185,8 @@ def analyze_dna_rna():
         
         # AI predictions using the molecular_utils engine
         try:
-            if ai_engine:
+            from ai_engine import get_ai_prediction, ai_ready
+            if ai_ready():
                 ai_predictions = get_ai_prediction({
                     'sequence': sequence,
                     'sequence_type': sequence_type,
@@ -266,7 +266,8 @@ def analyze_molecule_route():
         results = analyze_molecule(input_value, input_type)
         
         # Enhanced AI predictions if AI engine is available
-        if ai_engine:
+        from ai_engine import get_ai_prediction, ai_ready
+        if ai_ready():
             try:
                 ai_predictions = get_ai_prediction({
                     'smiles': results.get('smiles', input_value)
@@ -305,10 +306,11 @@ def ai_predict():
     prediction_types = data.get('prediction_types', [])
     
     try:
+        from ai_engine import get_ai_prediction, ai_ready
         predictions = {}
         
         for pred_type in prediction_types:
-            if ai_engine:
+            if ai_ready():
                 result = get_ai_prediction(compound_data, pred_type)
                 predictions[pred_type] = result
             else:
@@ -706,8 +708,9 @@ def ai_demo():
 def retrain_ai():
     """Trigger AI model retraining"""
     try:
-        if ai_engine:
-            success = ai_engine.retrain_models()
+        from ai_engine import ai_ready, retrain_ai_models
+        if ai_ready():
+            success = retrain_ai_models()
             if success:
                 return jsonify({
                     'success': True,
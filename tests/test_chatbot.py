@@ -0,0 +1,43 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import app  # noqa: F401  (loads routes, which imports chatbot, so it must come first)
+from chatbot import DrugDiscoveryBot
+
+AI_RESPONSE = "Answer from the AI engine"
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    """A bot whose AI engine always answers and whose interactions aren't stored"""
+    ai_engine = types.ModuleType('ai_engine')
+    ai_engine.get_chatbot_response = lambda query, context=None: AI_RESPONSE
+    monkeypatch.setitem(sys.modules, 'ai_engine', ai_engine)
+    monkeypatch.setattr(DrugDiscoveryBot, '_store_interaction', lambda *args: None)
+    return DrugDiscoveryBot()
+
+
+@pytest.mark.parametrize('query', [
+    "Which compound is the most toxic?",
+    "Is this molecule safe?",
+    "What do they know about the mechanism of aspirin?",
+])
+def test_greeting_substrings_reach_the_ai_engine(bot, query):
+    assert bot.get_response(query) == AI_RESPONSE
+
+
+@pytest.mark.parametrize('query', ["hello", "Hi!", "hey, greetings"])
+def test_bare_greeting_is_answered_without_the_ai_engine(bot, query):
+    response, confidence = bot._respond(query)
+    assert response in bot.greeting_responses
+    assert confidence == 0.95
+
+
+def test_greeting_with_a_question_reaches_the_ai_engine(bot):
+    assert bot.get_response("Hi, what is the mechanism of action of aspirin?") == AI_RESPONSE